@@ -1,6 +1,8 @@
 import os
 import json
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 
@@ -14,19 +16,37 @@ from dotenv import load_dotenv
 
 # --- Database Imports ---
 from database.connection import get_db
-from database.models import Tweet, TrackRequest, PnlCard
+from database.models import Tweet, TrackRequest, PnlCard, ProjectSentimentRollup
 
 # --- Service Imports (Fixes the errors) ---
 from services.story_service import register_ip_on_chain
-from services.tracker import run_single_project_tracker
-from services.analyzer import analyze_and_update_sentiment
+from services.analyzer import warm_up_model
+from services.jobs import UpdateJobQueue
+from services.scheduler import record_project_request
 
 # --- Configuration ---
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("dugtrio.api")
 
-app = FastAPI(title="DugTrio API", description="Sentiment Analysis & IP Registration")
+# Background workers for /update (scrape + analysis never run on the event loop)
+update_jobs = UpdateJobQueue()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Loads the sentiment model once at startup so /update doesn't pay for it."""
+    update_jobs.start()
+    try:
+        # Off the event loop: loading + a dummy inference takes several seconds
+        await asyncio.to_thread(warm_up_model)
+        logger.info("🤖 Sentiment model warmed up.")
+    except Exception as e:
+        # Not fatal: the model will be loaded lazily on the first analysis instead
+        logger.error(f"Model warm-up failed: {e}")
+    yield
+    update_jobs.stop()
+
+app = FastAPI(title="DugTrio API", description="Sentiment Analysis & IP Registration", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -42,42 +62,88 @@ app.add_middleware(
 def read_root():
     return {"status": "online", "service": "DugTrio Backend"}
 
+def _sentiment_label(score: float) -> str:
+    """Maps an average sentiment score to the label shown to users."""
+    if score > 0.6: return "Bullish"
+    if score < 0.4: return "Bearish"
+    return "Neutral"
+
 @app.get("/sentiment")
 def get_sentiment_for_bot(db: Session = Depends(get_db)):
-    """Returns aggregated sentiment data."""
+    """
+    Returns aggregated sentiment data.
+    Uses two queries regardless of how many projects are tracked: one read of the
+    sentiment rollup and one windowed query for the 3 most recent tweets per project.
+    """
+    # 1. Average score per project from the rollup maintained by the analyzer
+    rollups = db.query(
+        ProjectSentimentRollup.project_tag,
+        ProjectSentimentRollup.score_sum,
+        ProjectSentimentRollup.score_count
+    ).filter(
+        ProjectSentimentRollup.project_tag != "", ProjectSentimentRollup.score_count > 0
+    ).order_by(ProjectSentimentRollup.project_tag).all()
+
+    if not rollups:
+        return []
+
+    # 2. Recent tweets per project, ranked with ROW_NUMBER() over each project
+    ranked = db.query(
+        Tweet.project_tag.label("project_tag"),
+        Tweet.text.label("text"),
+        func.row_number().over(
+            partition_by=Tweet.project_tag,
+            order_by=Tweet.created_at.desc()
+        ).label("rn"),
+    ).filter(Tweet.project_tag != None, Tweet.project_tag != "").subquery()
+
+    recent_rows = db.query(ranked.c.project_tag, ranked.c.text).filter(
+        ranked.c.rn <= 3
+    ).order_by(ranked.c.project_tag, ranked.c.rn).all()
+
+    recent_by_project: Dict[str, List[str]] = {}
+    for project_tag, text in recent_rows:
+        recent_by_project.setdefault(project_tag, []).append(text)
+
     results = []
-    projects = db.query(Tweet.project_tag).distinct().all()
-    
-    for (project_tag,) in projects:
-        if not project_tag: continue
-        
-        # 1. Calculate Average Score
-        avg_score = db.query(func.avg(Tweet.sentiment_score)).filter(
-            Tweet.project_tag == project_tag, Tweet.sentiment_score != None
-        ).scalar()
-        
-        if avg_score is None: continue
-        
-        # 2. Fetch Recent Tweets
-        recent_tweets = db.query(Tweet.text).filter(
-            Tweet.project_tag == project_tag
-        ).order_by(Tweet.created_at.desc()).limit(3).all()
-        
-        tweet_texts = [t[0] for t in recent_tweets]
-
-        if avg_score > 0.6: label = "Bullish"
-        elif avg_score < 0.4: label = "Bearish"
-        else: label = "Neutral"
-        
+    for project_tag, score_sum, score_count in rollups:
+        avg_score = score_sum / score_count
         results.append({
-            "project_tag": project_tag, 
-            "label": label, 
+            "project_tag": project_tag,
+            "label": _sentiment_label(avg_score),
             "score": round(avg_score, 2),
-            "tweets": tweet_texts
+            "tweets": recent_by_project.get(project_tag, [])
         })
-        
+
     return results
 
+@app.get("/sentiment/{project_tag}")
+def get_project_sentiment(project_tag: str, db: Session = Depends(get_db)):
+    """Returns aggregated sentiment data for a single project (case-insensitive)."""
+    tag = project_tag.lower()
+
+    # 1. Average score from the rollup (one row per stored casing of the tag, ix_rollup_project_lower)
+    score_sum, score_count = db.query(
+        func.sum(ProjectSentimentRollup.score_sum),
+        func.sum(ProjectSentimentRollup.score_count)
+    ).filter(func.lower(ProjectSentimentRollup.project_tag) == tag).one()
+
+    if not score_count:
+        raise HTTPException(status_code=404, detail=f"No sentiment data found for {project_tag}.")
+    avg_score = score_sum / score_count
+
+    # 2. Recent tweets (ix_project_lower_created serves the ORDER BY created_at DESC)
+    recent_tweets = db.query(Tweet.project_tag, Tweet.text).filter(
+        func.lower(Tweet.project_tag) == tag
+    ).order_by(Tweet.created_at.desc()).limit(3).all()
+
+    return {
+        "project_tag": recent_tweets[0][0] if recent_tweets else project_tag,
+        "label": _sentiment_label(avg_score),
+        "score": round(avg_score, 2),
+        "tweets": [t[1] for t in recent_tweets]
+    }
+
 @app.get("/tweets")
 def get_tweets_count(db: Session = Depends(get_db)):
     return db.query(Tweet).limit(10).all() if Tweet else []
@@ -101,9 +167,7 @@ async def register_sentiment_ip(project_tag: str, db: Session = Depends(get_db))
         raise HTTPException(status_code=404, detail=f"No sentiment data found for {project_tag}. Please wait for the scraper to collect data.")
     
     # 2. Prepare Report
-    sentiment_label = "Neutral"
-    if avg_score > 0.6: sentiment_label = "Bullish"
-    elif avg_score < 0.4: sentiment_label = "Bearish"
+    sentiment_label = _sentiment_label(avg_score)
     
     report = {
         "project": project_tag,
@@ -128,23 +192,30 @@ async def register_sentiment_ip(project_tag: str, db: Session = Depends(get_db))
         logger.error(f"IP Registration Failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/update/{project_tag}")
-async def trigger_update(project_tag: str):
+@app.post("/update/{project_tag}", status_code=202)
+def trigger_update(project_tag: str, db: Session = Depends(get_db)):
     """
-    Triggers an on-demand scrape and analysis for a specific project.
-    Called by the bot when a user requests sentiment.
+    Queues an on-demand scrape and analysis for a specific project.
+    Called by the bot when a user requests sentiment; poll GET /jobs/{job_id} for progress.
+    Concurrent requests for the same project share one job ("reused": true).
     """
-    logger.info(f"🔄 Triggering update for {project_tag}...")
-    
-    # Run in a separate thread to avoid blocking the API
+    logger.info(f"🔄 Queueing update for {project_tag}...")
+
+    # User demand moves the project up the tracker's refresh schedule
     try:
-        # 1. Scrape (10 tweets max)
-        run_single_project_tracker(project_tag)
-        
-        # 2. Analyze
-        analyze_and_update_sentiment()
-        
-        return {"status": "updated", "project": project_tag}
+        record_project_request(db, project_tag)
+        db.commit()
     except Exception as e:
-        logger.error(f"Update failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        logger.warning(f"Could not record request for {project_tag}: {e}")
+        db.rollback()
+
+    job = update_jobs.submit(project_tag)
+    return {"status": job["status"], "project": project_tag, "job_id": job["id"], "reused": job["reused"]}
+
+@app.get("/jobs/{job_id}")
+def get_job_status(job_id: str):
+    """Reports the status and progress of a queued update job."""
+    job = update_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return job
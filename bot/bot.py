@@ -3,6 +3,7 @@ import asyncio
 import httpx
 import logging
 from datetime import datetime
+from typing import Optional
 from dotenv import load_dotenv
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.constants import ParseMode
@@ -26,6 +27,31 @@ logger = logging.getLogger(__name__)
 if not TELEGRAM_BOT_TOKEN:
     raise ValueError("Missing TELEGRAM_BOT_TOKEN in .env")
 
+# --- HTTP Client ---
+# One pooled client is shared by every handler, so bot -> API calls reuse
+# keep-alive connections instead of paying a new TCP handshake each time.
+# Each call still passes its own timeout.
+
+def build_http_client() -> httpx.AsyncClient:
+    try:
+        import h2  # noqa: F401  (HTTP/2 support is optional: pip install httpx[http2])
+        http2 = True
+    except ImportError:
+        http2 = False
+    return httpx.AsyncClient(
+        base_url=API_BASE_URL,
+        http2=http2,
+        timeout=httpx.Timeout(10.0),
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=30.0),
+    )
+
+def get_http_client(context: ContextTypes.DEFAULT_TYPE) -> httpx.AsyncClient:
+    """Returns the application's shared client (created by main(), or lazily if the bot runs elsewhere)."""
+    client = context.bot_data.get("http_client")
+    if client is None or client.is_closed:
+        client = context.bot_data["http_client"] = build_http_client()
+    return client
+
 # --- Keyboards ---
 
 def main_menu_keyboard():
@@ -86,33 +112,67 @@ async def sentiment_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
         parse_mode=ParseMode.HTML
     )
 
+async def trigger_update_and_wait(client: httpx.AsyncClient, project: str, timeout: float = 30.0, poll_interval: float = 1.0) -> Optional[dict]:
+    """
+    Queues a scrape + analysis job for the project and polls it until it finishes.
+    Returns the final job status (status "failed" if the job failed or was lost),
+    or None if the update could not be queued or timed out.
+    """
+    try:
+        resp = await client.post(f"/update/{project}", timeout=5.0)
+        resp.raise_for_status()
+        job = resp.json()
+        if job.get("status") == "done":
+            # Project was refreshed moments ago; nothing to wait for
+            return job
+        job_id = job["job_id"]
+
+        deadline = asyncio.get_running_loop().time() + timeout
+        while asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(poll_interval)
+            resp = await client.get(f"/jobs/{job_id}", timeout=5.0)
+            if resp.status_code == 404:
+                # The API restarted (jobs are kept in memory) or expired the job; it will never finish
+                logger.warning(f"Auto-update job {job_id} for {project} no longer exists.")
+                return {"id": job_id, "project": project, "status": "failed", "error": "Update job was lost."}
+            resp.raise_for_status()
+            job = resp.json()
+            if job.get("status") in ("done", "failed"):
+                return job
+        logger.warning(f"Auto-update for {project} still running after {timeout}s.")
+    except Exception as e:
+        logger.error(f"Auto-update failed: {e}")
+    return None
+
+def update_failed_note(job: Optional[dict]) -> str:
+    """A line telling the user the data wasn't refreshed, or "" if the update didn't fail."""
+    if job and job.get("status") == "failed":
+        return "\n<i>⚠️ Couldn't refresh data from X just now.</i>"
+    return ""
+
+async def get_project_sentiment(client: httpx.AsyncClient, project: str) -> Optional[dict]:
+    """Fetches sentiment for a single project from the API. Returns None if unavailable."""
+    try:
+        resp = await client.get(f"/sentiment/{project}", timeout=5.0)
+        if resp.status_code == 200:
+            return resp.json()
+    except Exception as e:
+        logger.error(f"Sentiment API failed: {e}")
+    return None
+
 async def fetch_sentiment(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     # Show a "loading" notification to the user because this might take a few seconds
     await query.answer("🔄 Fetching fresh data from X...", show_alert=False)
     project = query.data.split("_")[1]
+    client = get_http_client(context)
     
     # 0. Trigger Auto-Update (The Magic Fix)
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-             # We don't care about the response content, just that it finishes
-             await client.post(f"{API_BASE_URL}/update/{project}")
-    except Exception as e:
-        logger.error(f"Auto-update failed: {e}")
-        # We continue anyway, in case there is old data we can show
-
-    proj_data = None
+    # If it fails or times out we continue anyway, in case there is old data we can show
+    job = await trigger_update_and_wait(client, project)
 
     # 1. Try to fetch real data from API
-    try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(f"{API_BASE_URL}/sentiment", timeout=5.0)
-            if resp.status_code == 200:
-                data = resp.json()
-                if isinstance(data, list):
-                    proj_data = next((item for item in data if item.get("project_tag", "").lower() == project.lower()), None)
-    except Exception as e:
-        logger.error(f"Sentiment API failed: {e}")
+    proj_data = await get_project_sentiment(client, project)
 
     # 2. Display Result (No more fake fallback)
     if proj_data:
@@ -133,6 +193,7 @@ async def fetch_sentiment(update: Update, context: ContextTypes.DEFAULT_TYPE):
         text = (f"<b>⚠️ No Data Found for ${project.upper()}</b>\n\n"
                 "The scraper has not collected enough data for this project yet.\n"
                 "Please try again later or check another project.")
+    text += update_failed_note(job)
 
     await query.message.edit_text(text, reply_markup=back_button(), parse_mode=ParseMode.HTML)
 
@@ -161,20 +222,20 @@ async def register_ip_command(update: Update, context: ContextTypes.DEFAULT_TYPE
     msg = await update.message.reply_text(f"⛓️ Minting IP for <b>${project.upper()}</b> on Story Protocol...", parse_mode=ParseMode.HTML)
 
     try:
-        async with httpx.AsyncClient(timeout=90.0) as client:
-            # We use the same endpoint, but if it fails (404/500), we catch it here
-            # NOTE: Ideally, the backend should handle the fallback, but for now we rely on the backend's logic.
-            # If the backend returns 404 because DB is empty, we can't fix it from the bot easily without changing backend.
-            # However, I've updated main.py previously to handle empty DB. 
-            # If you are still getting "Not Found", ensure main.py is running the latest version.
-            
-            resp = await client.post(f"{API_BASE_URL}/ip/register-sentiment/{project}")
+        # We use the same endpoint, but if it fails (404/500), we catch it here
+        # NOTE: Ideally, the backend should handle the fallback, but for now we rely on the backend's logic.
+        # If the backend returns 404 because DB is empty, we can't fix it from the bot easily without changing backend.
+        # However, I've updated main.py previously to handle empty DB. 
+        # If you are still getting "Not Found", ensure main.py is running the latest version.
+        
+        # On-chain registration waits for the tx to be mined, hence the long timeout
+        resp = await get_http_client(context).post(f"/ip/register-sentiment/{project}", timeout=90.0)
+        
+        if resp.status_code != 200:
+            # If backend fails, raise error to trigger catch block
+            raise Exception(f"API Error: {resp.text}")
             
-            if resp.status_code != 200:
-                # If backend fails, raise error to trigger catch block
-                raise Exception(f"API Error: {resp.text}")
-                
-            data = resp.json()
+        data = resp.json()
             
         text = (f"<b>✅ IP Registered Successfully!</b>\n\n"
                 f"<b>Project:</b> ${data['project'].upper()}\n"
@@ -224,25 +285,13 @@ async def sentiment_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     project = context.args[0]
     msg = await update.message.reply_text(f"🔄 Fetching fresh data for <b>${project.upper()}</b>...", parse_mode=ParseMode.HTML)
+    client = get_http_client(context)
 
     # 1. Trigger Auto-Update
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-             await client.post(f"{API_BASE_URL}/update/{project}")
-    except Exception as e:
-        logger.error(f"Auto-update failed: {e}")
+    job = await trigger_update_and_wait(client, project)
 
     # 2. Fetch Result
-    proj_data = None
-    try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(f"{API_BASE_URL}/sentiment", timeout=5.0)
-            if resp.status_code == 200:
-                data = resp.json()
-                if isinstance(data, list):
-                    proj_data = next((item for item in data if item.get("project_tag", "").lower() == project.lower()), None)
-    except Exception as e:
-        logger.error(f"Sentiment API failed: {e}")
+    proj_data = await get_project_sentiment(client, project)
 
     if proj_data:
         text = (f"<b>📊 Analysis for ${project.upper()}</b>\n\n"
@@ -256,12 +305,13 @@ async def sentiment_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
                  text += f"• <i>{clean_t}</i>\n"
 
         text += "\n<i>Based on recent social activity.</i>"
+        text += update_failed_note(job)
         await msg.edit_text(text, parse_mode=ParseMode.HTML, reply_markup=back_button())
     else:
         await msg.edit_text(
             f"<b>⚠️ No Data Found for ${project.upper()}</b>\n\n"
             "The scraper could not find enough recent tweets.\n"
-            "Try a more popular project or wait a moment.",
+            "Try a more popular project or wait a moment." + update_failed_note(job),
             parse_mode=ParseMode.HTML,
             reply_markup=back_button()
         )
@@ -270,6 +320,10 @@ async def sentiment_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def main():
     application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
 
+    # Shared, pooled HTTP client for all handlers (closed on shutdown below)
+    http_client = build_http_client()
+    application.bot_data["http_client"] = http_client
+
     # Commands
     application.add_handler(CommandHandler("start", start_command))
     application.add_handler(CommandHandler("registerip", register_ip_command))
@@ -293,8 +347,11 @@ async def main():
     await application.start()
     await application.updater.start_polling()
     
-    while True:
-        await asyncio.sleep(10)
+    try:
+        while True:
+            await asyncio.sleep(10)
+    finally:
+        await http_client.aclose()
 
 if __name__ == "__main__":
     try:
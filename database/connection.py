@@ -2,6 +2,7 @@ import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.ext.declarative import declarative_base
 from typing import Generator
 
@@ -31,10 +32,16 @@ def get_db() -> Generator:
 def create_all_tables():
     """Creates all tables in the database defined by models."""
     # Import all models here to ensure they are registered with Base
-    from database.models import User, Tweet, TrackedWallet, TrackRequest, PnlCard, TrendingProject
+    from database.models import User, Tweet, ProjectSentimentRollup, SentimentCacheEntry, TrackedWallet, TrackRequest, TweetWatermark, ProjectActivity, XApiQuota, PnlCard, PnlImageHash, PnlCardMedia, TrendingProject
     print("Attempting to create tables...")
     try:
         Base.metadata.create_all(bind=engine)
+        # create_all skips tables that already exist, so indexes added to them later are created here
+        # (IF NOT EXISTS rather than checkfirst, which can't see expression indexes on SQLite)
+        with engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    conn.execute(CreateIndex(index, if_not_exists=True))
         print("Tables created successfully.")
     except Exception as e:
         print(f"An error occurred during table creation: {e}")
\ No newline at end of file
@@ -41,12 +41,33 @@ class Tweet(Base):
     __table_args__ = (
         Index('ix_project_sentiment', 'project_tag', 'sentiment_label'),
         Index('ix_project_created', 'project_tag', 'created_at'),
+        # Case-insensitive lookups (GET /sentiment/{project_tag}) filter on lower(project_tag)
+        Index('ix_project_lower_created', func.lower(project_tag), created_at),
     )
 
     def __repr__(self):
         return f"<Tweet(id={self.id}, project='{self.project_tag}', sentiment='{self.sentiment_label}')>"
 
 
+# This model keeps a running total of sentiment scores per project.
+# It is maintained incrementally by the analyzer so reads don't have to AVG() the tweets table.
+class ProjectSentimentRollup(Base):
+    __tablename__ = 'project_sentiment_rollup'
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_tag = Column(String, unique=True, nullable=False, index=True)
+    score_sum = Column(Float, nullable=False, default=0.0)
+    score_count = Column(Integer, nullable=False, default=0)
+    last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index('ix_rollup_project_lower', func.lower(project_tag)),
+    )
+
+    def __repr__(self):
+        return f"<ProjectSentimentRollup(project='{self.project_tag}', count={self.score_count})>"
+
+
 # This model stores the extracted data from a PNL card image.
 class PnlCard(Base):
     __tablename__ = 'pnl_cards'
@@ -95,6 +116,99 @@ class TrackRequest(Base):
         return f"<TrackRequest(id={self.id}, project_name='{self.project_name}')>"
 
 
+# This model persists sentiment results by normalised tweet text, so copy-pasted
+# tweets are only run through the model once, across analyzer runs.
+class SentimentCacheEntry(Base):
+    __tablename__ = 'sentiment_cache'
+
+    id = Column(Integer, primary_key=True, index=True)
+    text_hash = Column(String(64), nullable=False) # sha256 of the normalised text
+    model_name = Column(String, nullable=False)
+    label = Column(String, nullable=False)
+    score = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('ux_sentiment_cache_hash_model', 'text_hash', 'model_name', unique=True),
+    )
+
+    def __repr__(self):
+        return f"<SentimentCacheEntry(hash='{self.text_hash[:12]}', label='{self.label}', score={self.score})>"
+
+
+# This model stores the newest tweet id fetched per project (the since_id high-water mark),
+# so the tracker only asks X for tweets it hasn't seen yet.
+class TweetWatermark(Base):
+    __tablename__ = 'tweet_watermarks'
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_tag = Column(String, unique=True, nullable=False, index=True)
+    since_id = Column(String, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<TweetWatermark(project='{self.project_tag}', since_id='{self.since_id}')>"
+
+
+# This model tracks how often users ask about a project and when it was last fetched from X.
+# The tracker's scheduler uses it to refresh in-demand, stale projects first.
+class ProjectActivity(Base):
+    __tablename__ = 'project_activity'
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_tag = Column(String, unique=True, nullable=False, index=True) # stored lowercase
+    request_count = Column(Integer, nullable=False, default=0)
+    last_requested_at = Column(DateTime(timezone=True), nullable=True)
+    last_fetched_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<ProjectActivity(project='{self.project_tag}', requests={self.request_count})>"
+
+
+# This model is the persistent X API quota ledger: tweets consumed per calendar month.
+class XApiQuota(Base):
+    __tablename__ = 'x_api_quota'
+
+    id = Column(Integer, primary_key=True, index=True)
+    month = Column(String, unique=True, nullable=False, index=True) # e.g., 2024-05
+    tweets_consumed = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<XApiQuota(month='{self.month}', consumed={self.tweets_consumed})>"
+
+
+# This model maps the sha256 of a PNL card image's bytes to the card that was OCR'd for it,
+# so reposts of the same image file reuse that result instead of running OCR again.
+class PnlImageHash(Base):
+    __tablename__ = 'pnl_image_hashes'
+
+    id = Column(Integer, primary_key=True, index=True)
+    image_hash = Column(String(64), unique=True, nullable=False, index=True)
+    pnl_card_id = Column(Integer, ForeignKey('pnl_cards.id'), nullable=False)
+    ocr_seconds = Column(Float, nullable=True) # what OCR cost the first time, i.e. what each reuse saves
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    pnl_card = relationship("PnlCard")
+
+    def __repr__(self):
+        return f"<PnlImageHash(hash='{self.image_hash[:12]}', pnl_card_id={self.pnl_card_id})>"
+
+
+# This model records which media cache file (services.media_cache) holds a tweet's PNL card image,
+# so its card can be reprocessed later without downloading the image again.
+class PnlCardMedia(Base):
+    __tablename__ = 'pnl_card_media'
+
+    id = Column(Integer, primary_key=True, index=True)
+    tweet_id = Column(Integer, ForeignKey('tweets.id'), unique=True, nullable=False, index=True)
+    media_cache_key = Column(String(64), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<PnlCardMedia(tweet_id={self.tweet_id}, key='{self.media_cache_key[:12]}')>"
+
+
 # This model stores the results of the trend analysis.
 class TrendingProject(Base):
     __tablename__ = 'trending_projects'
@@ -0,0 +1,63 @@
+"""
+Benchmarks sentiment inference throughput (tweets/sec on CPU) by batch size.
+
+Feeds the same synthetic tweets through the RoBERTa pipeline with
+services.analyzer.score_texts at each batch size. No database is touched.
+
+Usage:
+    python -m scripts.bench_analyzer_batching --tweets 256 --batch-sizes 1 8 32 64
+"""
+import os
+import time
+import random
+import argparse
+
+# database.connection refuses to import without a DATABASE_URL
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from services.analyzer import get_sentiment_pipeline, score_texts
+
+SAMPLE_PHRASES = [
+    "$SOL looking strong, breaking resistance again",
+    "this dip is tasty, loading up more",
+    "rugged again... never trusting these devs",
+    "JUP airdrop claim is live, check your wallet",
+    "not sure about PYTH here, volume is drying up",
+    "BONK to the moon 🚀🚀🚀 we are so early",
+    "network congestion is killing my trades today",
+    "bullish on the ecosystem long term, short term chop",
+]
+
+
+def synthetic_tweets(count: int):
+    """Builds tweets of varying length so padding behaves like real traffic."""
+    rng = random.Random(42)
+    return [" ".join(rng.choices(SAMPLE_PHRASES, k=rng.randint(1, 6))) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tweets", type=int, default=256)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--model", default="cardiffnlp/twitter-roberta-base-sentiment")
+    args = parser.parse_args()
+
+    print(f"Loading {args.model} on CPU...")
+    sentiment_pipeline = get_sentiment_pipeline(args.model)
+    texts = synthetic_tweets(args.tweets)
+
+    # Warm-up so the first measured run doesn't pay one-off allocation costs
+    score_texts(sentiment_pipeline, texts[:8], 8)
+
+    print(f"\n{'batch':>6} | {'seconds':>8} | {'tweets/sec':>10}")
+    print("-" * 32)
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, len(texts), batch_size):
+            score_texts(sentiment_pipeline, texts[i:i + batch_size], batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"{batch_size:>6} | {elapsed:>8.2f} | {len(texts) / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmarks services.pnl_parser against the parser it replaced, which passed
+pattern strings to re.search (re's internal cache means those were not
+recompiled per call either, so expect only a modest difference).
+
+Generates a fixed set of OCR-like strings (seeded, so every run sees the same
+texts): clean and noisy PNL cards, dark-theme misreads, unrelated screenshots.
+Both parsers run over all of them; reports µs/text for each and checks that
+they return identical results for every text.
+
+Usage:
+    python -m scripts.bench_pnl_parser --texts 100000
+"""
+import os
+import re
+import sys
+import time
+import random
+import logging
+import argparse
+from typing import Any, Dict
+
+# database.connection refuses to import without a DATABASE_URL
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from services.pnl_parser import parse_pnl_data
+
+SYMBOLS = ["SOL", "JUP", "BONK", "PYTH", "WIF", "RAY", "ORCA", "JITO", "MEW", "POPCAT"]
+PNL_LABELS = ["PNL", "Pnl", "PnL:", "Profit", "Loss", "ROI", "Realized PNL", ""]
+ENTRY_LABELS = ["Entry Price", "Entry", "entry price:", "Entry Price :", "Avg Entry", "Open"]
+EXIT_LABELS = ["Exit Price", "Exit", "exit price:", "Mark Price", "Close", "Last Price"]
+NOISE = [
+    "Shared via DugTrio Perps", "Leverage 20x", "LONG", "SHORT", "Scan to join",
+    "Referral code: MOON42", "2024-11-03 14:22:10", "Isolated", "Cross 10X",
+    "Follow @dugtrio", "Powered by Solana", "USDC", "|", "—", "Ä", "*",
+]
+
+
+def _number(rng: random.Random) -> str:
+    value = rng.choice([rng.uniform(0.0001, 1), rng.uniform(1, 300), rng.uniform(300, 90000)])
+    return rng.choice([f"{value:.2f}", f"{value:.4f}", f"{value:,.2f}", str(int(value)), f"{value:.6f}"])
+
+
+def _misread(rng: random.Random, text: str) -> str:
+    """Typical tesseract slips: dropped/extra spaces, O for 0, stray newlines."""
+    swaps = [(" ", ""), (" ", "  "), ("0", "O"), (":", ";"), ("%", " %"), ("$", "S"), (" ", "\n"), ("-", "- ")]
+    for _ in range(rng.randint(0, 3)):
+        old, new = rng.choice(swaps)
+        text = text.replace(old, new, 1)
+    return text
+
+
+def synthetic_ocr_text(rng: random.Random) -> str:
+    """One OCR-like string."""
+    if rng.random() < 0.1:
+        # Not a PNL card at all
+        return " ".join(rng.choices(NOISE + ["gm", "wagmi", "chart", "entry soon"], k=rng.randint(1, 12)))
+
+    symbol = rng.choice(SYMBOLS)
+    pnl = rng.uniform(-99, 2500)
+    lines = [
+        rng.choice([f"${symbol}", f"{symbol}", f"{symbol}-PERP", f"{symbol}/USDC", f"${symbol.lower()}"]),
+        f"{rng.choice(PNL_LABELS)} {rng.choice(['+', '', ' + ']) if pnl >= 0 else rng.choice(['-', '- '])}{abs(pnl):.2f}%",
+        f"{rng.choice(ENTRY_LABELS)} {rng.choice(['$', '', ': $', ' '])}{_number(rng)}",
+        f"{rng.choice(EXIT_LABELS)} {rng.choice(['$', '', ': $', ' '])}{_number(rng)}",
+    ]
+    lines += rng.choices(NOISE, k=rng.randint(0, 5))
+    rng.shuffle(lines)
+    return _misread(rng, "\n".join(lines))
+
+
+def synthetic_ocr_texts(count: int, seed: int = 11):
+    rng = random.Random(seed)
+    return [synthetic_ocr_text(rng) for _ in range(count)]
+
+
+def legacy_parse_pnl_data(text: str) -> Dict[str, Any]:
+    """The previous services.pnl_analyzer.parse_pnl_data, kept verbatim as the baseline."""
+    data: Dict[str, Any] = {
+        "entry_price": None,
+        "exit_price": None,
+        "pnl_percentage": None,
+        "token_symbol": None,
+    }
+
+    text = text.lower()
+
+    pnl_match = re.search(r'(pnl|profit|loss)\s*:?\s*([\+\-]?\s*\d+(\.\d+)?)\s*%', text)
+    if pnl_match:
+        try:
+            pnl_value = pnl_match.group(2).replace(' ', '').replace('+', '')
+            data['pnl_percentage'] = float(pnl_value)
+        except (ValueError, AttributeError) as e:
+            logging.warning(f"Failed to parse PNL percentage: {e}")
+
+    if data['pnl_percentage'] is None:
+        pnl_match = re.search(r'([\+\-]\s*\d+(\.\d+)?)\s*%', text)
+        if pnl_match:
+            try:
+                pnl_value = pnl_match.group(1).replace(' ', '').replace('+', '')
+                data['pnl_percentage'] = float(pnl_value)
+            except (ValueError, AttributeError) as e:
+                logging.warning(f"Failed to parse PNL percentage from fallback: {e}")
+
+    symbol_match = re.search(r'\$([a-z]{3,5})\b', text)
+    if not symbol_match:
+        symbol_match = re.search(r'\b([a-z]{3,5})\b\s*(entry|exit)', text)
+    if symbol_match:
+        data['token_symbol'] = symbol_match.group(1).upper()
+
+    entry_match = re.search(r'entry\s*(price)?\s*:?\s*\$?(\d+(\.\d+)?)', text)
+    if entry_match:
+        try:
+            data['entry_price'] = float(entry_match.group(2))
+        except (ValueError, AttributeError) as e:
+            logging.warning(f"Failed to parse entry price: {e}")
+
+    exit_match = re.search(r'exit\s*(price)?\s*:?\s*\$?(\d+(\.\d+)?)', text)
+    if exit_match:
+        try:
+            data['exit_price'] = float(exit_match.group(2))
+        except (ValueError, AttributeError) as e:
+            logging.warning(f"Failed to parse exit price: {e}")
+
+    return data
+
+
+def measure(parse, texts, repeats: int):
+    """Returns (best-of-N µs/text, results of the last run)."""
+    best = float("inf")
+    results = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        results = [parse(text) for text in texts]
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6 / len(texts), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    # Misreads make both parsers warn about unparseable numbers; that's expected here
+    logging.disable(logging.WARNING)
+    texts = synthetic_ocr_texts(args.texts, args.seed)
+
+    print(f"{'parser':>12} | {'µs / text':>9} | {'texts/sec':>10}")
+    print("-" * 38)
+    legacy_us, legacy_results = measure(legacy_parse_pnl_data, texts, args.repeats)
+    print(f"{'legacy':>12} | {legacy_us:>9.2f} | {1e6 / legacy_us:>10,.0f}")
+    new_us, new_results = measure(parse_pnl_data, texts, args.repeats)
+    print(f"{'compiled':>12} | {new_us:>9.2f} | {1e6 / new_us:>10,.0f}")
+    print(f"\nSpeed-up: {legacy_us / new_us:.2f}x")
+
+    mismatches = [i for i, (old, new) in enumerate(zip(legacy_results, new_results)) if old != new]
+    if mismatches:
+        i = mismatches[0]
+        sys.exit(f"❌ {len(mismatches)} texts parsed differently, e.g. {texts[i]!r}:\n"
+                 f"   legacy {legacy_results[i]}\n   new    {new_results[i]}")
+    print(f"✅ Identical results on all {len(texts)} texts.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmarks GET /sentiment latency against the number of tracked project tags.
+
+Compares the old per-project loop (2N+1 queries) with the rollup read +
+window function implementation in api/main.py. Runs against a throwaway
+SQLite database so it never touches the real DATABASE_URL.
+
+Usage:
+    python -m scripts.bench_sentiment --tags 10 50 100 250 500 --tweets-per-tag 50
+"""
+import os
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+# database.connection refuses to import without a DATABASE_URL
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database.connection import Base
+from database.models import Tweet, ProjectSentimentRollup
+from api.main import get_sentiment_for_bot
+
+
+def legacy_sentiment(db):
+    """The original N+1 implementation, kept here as the baseline."""
+    results = []
+    for (project_tag,) in db.query(Tweet.project_tag).distinct().all():
+        if not project_tag: continue
+        avg_score = db.query(func.avg(Tweet.sentiment_score)).filter(
+            Tweet.project_tag == project_tag, Tweet.sentiment_score != None
+        ).scalar()
+        if avg_score is None: continue
+        recent_tweets = db.query(Tweet.text).filter(
+            Tweet.project_tag == project_tag
+        ).order_by(Tweet.created_at.desc()).limit(3).all()
+        results.append({"project_tag": project_tag, "score": round(avg_score, 2),
+                        "tweets": [t[0] for t in recent_tweets]})
+    return results
+
+
+def seed(db, tag_count: int, tweets_per_tag: int):
+    now = datetime.utcnow()
+    rows = []
+    for t in range(tag_count):
+        for i in range(tweets_per_tag):
+            rows.append({
+                "tweet_id": f"{t}-{i}",
+                "text": f"synthetic tweet {i} about project{t}",
+                "author_username": "bench",
+                "created_at": now - timedelta(minutes=random.randint(0, 1440)),
+                "project_tag": f"project{t}",
+                "sentiment_label": "LABEL_2",
+                "sentiment_score": random.random(),
+            })
+    db.bulk_insert_mappings(Tweet, rows)
+
+    # The endpoint reads averages from the rollup the analyzer maintains
+    totals = {}
+    for row in rows:
+        total = totals.setdefault(row["project_tag"], [0.0, 0])
+        total[0] += row["sentiment_score"]
+        total[1] += 1
+    db.bulk_insert_mappings(ProjectSentimentRollup, [
+        {"project_tag": tag, "score_sum": s, "score_count": c} for tag, (s, c) in totals.items()
+    ])
+    db.commit()
+
+
+def time_call(fn, db, repeats: int) -> float:
+    """Returns the best-of-N latency in milliseconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(db)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tags", type=int, nargs="+", default=[10, 50, 100, 250, 500])
+    parser.add_argument("--tweets-per-tag", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'tags':>6} | {'legacy (ms)':>12} | {'rollup (ms)':>12} | speedup")
+    print("-" * 50)
+    for tag_count in args.tags:
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            seed(db, tag_count, args.tweets_per_tag)
+            legacy_ms = time_call(legacy_sentiment, db, args.repeats)
+            rollup_ms = time_call(get_sentiment_for_bot, db, args.repeats)
+            print(f"{tag_count:>6} | {legacy_ms:>12.2f} | {rollup_ms:>12.2f} | {legacy_ms / rollup_ms:.1f}x")
+        finally:
+            db.close()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
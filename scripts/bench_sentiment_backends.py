@@ -0,0 +1,83 @@
+"""
+Benchmarks the sentiment inference backends on CPU: accuracy vs speed.
+
+Scores the fixed tweet fixture (scripts/fixtures/sentiment_tweets.txt) with
+every backend in services.analyzer and compares each against the
+full-precision torch results: label agreement, score drift and tweets/sec.
+No database is touched. Backends that can't load (e.g. optimum missing for
+onnx) are reported and skipped.
+
+Usage:
+    python -m scripts.bench_sentiment_backends --backends torch quantized onnx --repeats 5
+"""
+import os
+import time
+import argparse
+
+# database.connection refuses to import without a DATABASE_URL
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from services.analyzer import SENTIMENT_BACKENDS, SENTIMENT_MODEL_NAME, get_sentiment_pipeline, score_texts
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "sentiment_tweets.txt")
+
+
+def load_fixture(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def measure(backend: str, model: str, texts, batch_size: int, repeats: int):
+    """Returns (load seconds, best-of-N tweets/sec, results)."""
+    start = time.perf_counter()
+    sentiment_pipeline = get_sentiment_pipeline(model, backend)
+    load_s = time.perf_counter() - start
+
+    # Warm-up so the measured runs don't pay one-off allocation costs
+    results = score_texts(sentiment_pipeline, texts, batch_size)
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        score_texts(sentiment_pipeline, texts, batch_size)
+        best = min(best, time.perf_counter() - start)
+    return load_s, len(texts) / best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(SENTIMENT_BACKENDS), choices=SENTIMENT_BACKENDS)
+    parser.add_argument("--model", default=SENTIMENT_MODEL_NAME)
+    parser.add_argument("--fixture", default=FIXTURE_PATH)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = load_fixture(args.fixture)
+    print(f"Scoring {len(texts)} fixture tweets with {args.model}...")
+
+    # Everything is compared against full precision, so it always runs first
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    baseline = None
+    rows = []
+    for backend in backends:
+        try:
+            load_s, rate, results = measure(backend, args.model, texts, args.batch_size, args.repeats)
+        except Exception as e:
+            print(f"⚠️ Skipping {backend}: {e}")
+            continue
+
+        if baseline is None:
+            baseline_rate, baseline = rate, results
+        agree = sum(r["label"] == b["label"] for r, b in zip(results, baseline)) / len(texts)
+        drift = [abs(r["score"] - b["score"]) for r, b in zip(results, baseline)]
+        rows.append(f"{backend:>9} | {load_s:>7.1f} | {rate:>10.1f} | {rate / baseline_rate:>6.2f}x | "
+                    f"{agree:>8.1%} | {sum(drift) / len(drift):>10.4f} | {max(drift):>9.4f}")
+
+    print(f"\n{'backend':>9} | {'load s':>7} | {'tweets/sec':>10} | {'speed':>7} | {'labels =':>8} | {'mean |Δs|':>10} | {'max |Δs|':>9}")
+    print("-" * 82)
+    for line in rows:
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
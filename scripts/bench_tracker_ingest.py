@@ -0,0 +1,82 @@
+"""
+Benchmarks tweet ingestion into SQLite: the old per-tweet SELECT + add loop
+versus services.tracker.insert_tweets.
+
+Each path inserts the same synthetic tweets twice: once into an empty table
+(all new) and once more (all duplicates), which is what a rerun of the
+tracker over an overlapping time window looks like.
+
+Usage:
+    python -m scripts.bench_tracker_ingest --tweets 10000
+"""
+import os
+import time
+import tempfile
+import argparse
+from datetime import datetime, timedelta
+
+# database.connection refuses to import without a DATABASE_URL
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.connection import Base
+from database.models import Tweet
+from services.tracker import insert_tweets
+
+
+def synthetic_rows(count: int):
+    now = datetime.utcnow()
+    return [{
+        "tweet_id": str(10**18 + i),
+        "text": f"synthetic tweet {i} about $SOL",
+        "author_username": f"user{i % 500}",
+        "created_at": now - timedelta(seconds=i),
+        "project_tag": f"project{i % 20}",
+        "media_url": None,
+    } for i in range(count)]
+
+
+def legacy_insert(db, rows) -> int:
+    """The original loop: one SELECT per tweet, then an ORM add."""
+    added = 0
+    for row in rows:
+        exists = db.query(Tweet).filter(Tweet.tweet_id == row["tweet_id"]).first()
+        if not exists:
+            db.add(Tweet(**row))
+            added += 1
+    return added
+
+
+def run(name: str, insert_fn, rows, db_path: str):
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        for label in ("new", "duplicates"):
+            start = time.perf_counter()
+            added = insert_fn(db, rows)
+            db.commit()
+            elapsed = time.perf_counter() - start
+            print(f"{name:>8} | {label:>10} | {added:>8} | {elapsed:>8.2f} | {len(rows) / elapsed:>10.0f}")
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tweets", type=int, default=10000)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.tweets)
+    print(f"{'path':>8} | {'pass':>10} | {'inserted':>8} | {'seconds':>8} | {'tweets/sec':>10}")
+    print("-" * 58)
+    with tempfile.TemporaryDirectory() as tmp:
+        run("legacy", legacy_insert, rows, os.path.join(tmp, "legacy.db"))
+        run("bulk", insert_tweets, rows, os.path.join(tmp, "bulk.db"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmarks the tracker ingest path end to end without the X API.
+
+Writes a synthetic recording (the JSONL format services.tracker.ReplaySource
+reads), then runs the same steps as a full tracker run against a throwaway
+SQLite database: paginated fetch + parse via fetch_all_projects,
+insert_tweets and advance_watermarks. Three passes are timed:
+
+    new         empty table, every tweet is inserted
+    duplicates  no watermarks, every tweet is fetched again and deduplicated
+    watermarked since_id watermarks in place, nothing new to fetch
+
+A share of tweets (--overlap) matches more than one project query, so
+in-batch deduplication is exercised too. Pass --replay-file to use a real
+recording (e.g. one made with TweepySource(record_path=...)) instead.
+
+Usage:
+    python -m scripts.bench_tracker_replay --tweets 1000000 --projects 20
+"""
+import os
+import json
+import time
+import random
+import tempfile
+import argparse
+from datetime import datetime, timedelta
+
+# database.connection refuses to import without a DATABASE_URL
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+# Full pages, like a paid X plan
+os.environ.setdefault("TRACKER_PAGE_SIZE", "100")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.connection import Base
+from services.tracker import (
+    X_SNOWFLAKE_EPOCH_MS, ReplaySource, fetch_all_projects, insert_tweets, advance_watermarks, get_watermarks,
+)
+
+PAGE_SIZE = 100
+
+
+def project_query(name: str) -> str:
+    return f'"{name}" -is:retweet lang:en'
+
+
+def write_recording(path: str, tweet_count: int, project_count: int, overlap: float):
+    """Writes `tweet_count` synthetic tweets as recorded search pages spread over the projects."""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    pages = {f"project{p}": [] for p in range(project_count)}
+    users = [{"id": str(1000 + u), "name": f"User {u}", "username": f"user{u}"} for u in range(500)]
+
+    for i in range(tweet_count):
+        created = now - timedelta(seconds=i)
+        # Real snowflake ids, so watermarks built from them count as recent
+        tweet_id = str(int((created - datetime(1970, 1, 1)).total_seconds() * 1000 - X_SNOWFLAKE_EPOCH_MS) << 22)
+        tweet = {
+            "id": tweet_id,
+            "text": f"synthetic tweet {i} about $SOL",
+            "author_id": users[i % len(users)]["id"],
+            "created_at": created.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+            "edit_history_tweet_ids": [tweet_id],
+        }
+        matches = [i % project_count]
+        if rng.random() < overlap:
+            matches.append(rng.randrange(project_count))
+        for p in set(matches):
+            pages[f"project{p}"].append(tweet)
+
+    with open(path, "w", encoding="utf-8") as f:
+        for name, tweets in pages.items():
+            for i in range(0, len(tweets), PAGE_SIZE):
+                chunk = tweets[i:i + PAGE_SIZE]
+                author_ids = {t["author_id"] for t in chunk}
+                f.write(json.dumps({
+                    "query": project_query(name),
+                    "data": chunk,
+                    "includes": {"users": [u for u in users if u["id"] in author_ids]},
+                }) + "\n")
+    return [{"name": name, "query": project_query(name)} for name in pages]
+
+
+def run_pass(label: str, db, source, projects, use_watermarks: bool):
+    since_ids = get_watermarks(db, [p["name"] for p in projects]) if use_watermarks else {}
+
+    start = time.perf_counter()
+    rows, _ = fetch_all_projects(source, projects, since_ids, project_budget=10**12)
+    fetched_at = time.perf_counter()
+    inserted = insert_tweets(db, rows)
+    advance_watermarks(db, rows)
+    db.commit()
+    done = time.perf_counter()
+
+    fetch_s, store_s = fetched_at - start, done - fetched_at
+    rate = len(rows) / (done - start) if rows else 0
+    return f"{label:>11} | {len(rows):>9} | {inserted:>9} | {fetch_s:>8.2f} | {store_s:>8.2f} | {rate:>10.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tweets", type=int, default=200000)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--overlap", type=float, default=0.1, help="share of tweets matching a second project")
+    parser.add_argument("--replay-file", help="existing recording to replay instead of synthetic tweets")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.replay_file:
+            recording = args.replay_file
+            source = ReplaySource(recording)
+            projects = [{"name": f"query{i}", "query": q} for i, q in enumerate(source.queries)]
+        else:
+            recording = os.path.join(tmp, "recording.jsonl")
+            print(f"Writing {args.tweets} synthetic tweets for {args.projects} projects...")
+            projects = write_recording(recording, args.tweets, args.projects, args.overlap)
+            source = ReplaySource(recording)
+        print(f"Loaded {source.tweet_count} recorded tweets across {len(projects)} queries.\n")
+
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine, autoflush=False)()
+        results = []
+        try:
+            results.append(run_pass("new", db, source, projects, use_watermarks=False))
+            results.append(run_pass("duplicates", db, source, projects, use_watermarks=False))
+            results.append(run_pass("watermarked", db, source, projects, use_watermarks=True))
+        finally:
+            db.close()
+            engine.dispose()
+
+    print(f"\n{'pass':>11} | {'fetched':>9} | {'inserted':>9} | {'fetch s':>8} | {'store s':>8} | {'tweets/sec':>10}")
+    print("-" * 72)
+    for line in results:
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Checks the PNL text parser against a golden file of OCR strings.
+
+scripts/fixtures/pnl_ocr_golden.jsonl holds OCR-like texts (hand-picked edge
+cases plus seeded synthetic cards) with the result the parser is expected to
+return for each, recorded from the parser that services.pnl_parser
+replaced. Exits non-zero on any difference.
+
+After an intended change to what the parser extracts, re-record the file with
+--update and review the diff.
+
+Usage:
+    python -m scripts.check_pnl_parser_golden
+    python -m scripts.check_pnl_parser_golden --update
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+
+# database.connection refuses to import without a DATABASE_URL
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from services.pnl_analyzer import parse_pnl_data
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "pnl_ocr_golden.jsonl")
+
+
+def load_golden(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--update", action="store_true", help="re-record the expected results with the current parser")
+    args = parser.parse_args()
+
+    # Some texts are deliberately unparseable; the warnings are expected
+    logging.disable(logging.WARNING)
+    cases = load_golden(GOLDEN_PATH)
+
+    if args.update:
+        with open(GOLDEN_PATH, "w", encoding="utf-8") as f:
+            for case in cases:
+                f.write(json.dumps({"text": case["text"], "expected": parse_pnl_data(case["text"])}, ensure_ascii=False) + "\n")
+        print(f"Re-recorded {len(cases)} cases in {GOLDEN_PATH}.")
+        return
+
+    failures = 0
+    for case in cases:
+        result = parse_pnl_data(case["text"])
+        if result != case["expected"]:
+            failures += 1
+            print(f"❌ {case['text']!r}\n   expected {case['expected']}\n   got      {result}")
+
+    if failures:
+        sys.exit(f"{failures}/{len(cases)} golden cases differ.")
+    print(f"✅ All {len(cases)} golden cases match.")
+
+
+if __name__ == "__main__":
+    main()
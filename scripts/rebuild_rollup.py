@@ -0,0 +1,34 @@
+from sqlalchemy import func
+from database.connection import SessionLocal
+from database.models import Tweet, ProjectSentimentRollup
+
+def rebuild_rollup():
+    """
+    Recomputes project_sentiment_rollup from the tweets table.
+    Run once after upgrading (to backfill tweets scored before the rollup existed)
+    or after deleting tweets by hand.
+    """
+    db = SessionLocal()
+    try:
+        print("\n🔁 --- REBUILDING SENTIMENT ROLLUP ---")
+        totals = db.query(
+            Tweet.project_tag, func.sum(Tweet.sentiment_score), func.count(Tweet.sentiment_score)
+        ).filter(
+            Tweet.project_tag != None, Tweet.sentiment_score != None
+        ).group_by(Tweet.project_tag).all()
+
+        db.query(ProjectSentimentRollup).delete()
+        for project_tag, score_sum, score_count in totals:
+            db.add(ProjectSentimentRollup(project_tag=project_tag, score_sum=score_sum, score_count=score_count))
+            print(f"  • {project_tag}: {score_count} scored tweets")
+
+        db.commit()
+        print(f"✅ Rebuilt rollup for {len(totals)} projects.")
+    except Exception as e:
+        print(f"❌ Rollup rebuild failed: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_rollup()
@@ -1,71 +1,445 @@
+import os
+import time
 import logging
-from transformers import pipeline
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
 from sqlalchemy.orm import Session
-from typing import List, Optional # Add Optional for better type hinting
+from sqlalchemy import Float, case, cast, func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Any, Dict, List, Optional, Set, Tuple # Add Optional for better type hinting
 
 from database.connection import SessionLocal
-from database.models import Tweet # Ensure Column is available for type analysis
+from database.models import Tweet, ProjectSentimentRollup # Ensure Column is available for type analysis
+from services.sentiment_cache import sentiment_cache, text_hash
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
-def analyze_and_update_sentiment():
+SENTIMENT_MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment"
+# Inference backend: "torch" (full precision), "quantized" (dynamic int8 torch)
+# or "onnx" (ONNX Runtime, needs `pip install optimum[onnxruntime]`).
+SENTIMENT_BACKENDS = ("torch", "quantized", "onnx")
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "torch").lower()
+# Where exported ONNX models are kept so the export only happens once per model.
+SENTIMENT_ONNX_DIR = os.getenv("SENTIMENT_ONNX_DIR", os.path.join("models", "onnx"))
+# Number of tweets sent through the model per forward pass.
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "32"))
+# Tweets scored per commit; a crash only loses the chunk in progress.
+ANALYZER_COMMIT_EVERY = int(os.getenv("ANALYZER_COMMIT_EVERY", "500"))
+# Seconds between progress log lines.
+ANALYZER_PROGRESS_SECONDS = float(os.getenv("ANALYZER_PROGRESS_SECONDS", "10"))
+# Worker processes for `--workers` mode; each loads its own copy of the model.
+ANALYZER_WORKERS = int(os.getenv("ANALYZER_WORKERS", "1"))
+# Tweets are short; anything past 128 tokens is truncated so padded batches stay small.
+SENTIMENT_MAX_TOKENS = 128
+# Tweets written per UPDATE statement (5 bound parameters each); keeps SQLite under its variable limit.
+SCORE_WRITE_CHUNK = 500
+
+# Process-wide model registry: (model name, backend) -> loaded pipeline (tokenizer + model).
+# Loading RoBERTa takes seconds, so it happens once per process instead of once per call.
+_model_registry: Dict[Tuple[str, str], Any] = {}
+_model_registry_lock = threading.Lock()
+
+def _load_pipeline(model_name: str, backend: str):
+    """Builds a sentiment-analysis pipeline for `model_name` on the given backend."""
+    if backend == "torch":
+        # FIX 1: Explicitly define the 'task' argument to resolve Pylance warning
+        return pipeline("sentiment-analysis", model=model_name)  # type: ignore
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if backend == "quantized":
+        import torch
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        # int8 weights for the Linear layers (the bulk of RoBERTa's compute); activations stay float
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)  # type: ignore
+
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+    except ImportError as e:
+        raise ImportError("SENTIMENT_BACKEND=onnx needs optimum: pip install optimum[onnxruntime]") from e
+
+    onnx_dir = os.path.join(SENTIMENT_ONNX_DIR, model_name.replace("/", "--"))
+    if os.path.exists(os.path.join(onnx_dir, "model.onnx")):
+        model = ORTModelForSequenceClassification.from_pretrained(onnx_dir)
+    else:
+        logging.info(f"Exporting {model_name} to ONNX in {onnx_dir} (first run only)...")
+        model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+        model.save_pretrained(onnx_dir)
+        tokenizer.save_pretrained(onnx_dir)
+    return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)  # type: ignore
+
+def get_sentiment_pipeline(model_name: str = SENTIMENT_MODEL_NAME, backend: Optional[str] = None):
+    """Returns the shared pipeline for `model_name` on `backend` (default SENTIMENT_BACKEND), loading it on first use."""
+    backend = (backend or SENTIMENT_BACKEND).lower()
+    if backend not in SENTIMENT_BACKENDS:
+        raise ValueError(f"Unknown sentiment backend '{backend}'. Choose one of: {', '.join(SENTIMENT_BACKENDS)}")
+
+    key = (model_name, backend)
+    sentiment_pipeline = _model_registry.get(key)
+    if sentiment_pipeline is not None:
+        return sentiment_pipeline
+
+    with _model_registry_lock:
+        # Another thread may have finished loading while we waited for the lock
+        if key not in _model_registry:
+            logging.info(f"Loading sentiment analysis model {model_name} ({backend} backend)...")
+            _model_registry[key] = _load_pipeline(model_name, backend)
+            logging.info("🤖 Model loaded successfully.")
+        return _model_registry[key]
+
+def sentiment_cache_key(model_name: str = SENTIMENT_MODEL_NAME, backend: Optional[str] = None) -> str:
+    """
+    Model identity used by the sentiment cache. Backends round scores slightly
+    differently, so non-torch results are cached separately.
+    """
+    backend = (backend or SENTIMENT_BACKEND).lower()
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
+
+def warm_up_model():
+    """Loads the shared model and runs one dummy inference so the first real request is fast."""
+    score_texts(get_sentiment_pipeline(), ["DugTrio warm-up"], 1)
+
+def score_texts(sentiment_pipeline, texts: List[str], batch_size: int = SENTIMENT_BATCH_SIZE) -> List[Dict[str, Any]]:
+    """Runs the pipeline over a list of texts in padded, truncated batches."""
+    return sentiment_pipeline(
+        texts,
+        batch_size=batch_size,
+        padding=True,
+        truncation=True,
+        max_length=SENTIMENT_MAX_TOKENS
+    )
+
+def _score_batch(sentiment_pipeline, batch: List[Any], batch_size: int) -> List[Optional[Dict[str, Any]]]:
+    """
+    Scores a batch of tweets. If the batch fails as a whole, falls back to scoring
+    tweets one at a time so a single bad tweet doesn't lose the rest of the batch.
+    """
+    try:
+        return score_texts(sentiment_pipeline, [tweet.text for tweet in batch], batch_size)
+    except Exception as e:
+        logging.warning(f"Batch inference failed ({e}); retrying tweets one by one.")
+
+    results: List[Optional[Dict[str, Any]]] = []
+    for tweet in batch:
+        try:
+            results.append(score_texts(sentiment_pipeline, [tweet.text], 1)[0])
+        except Exception as e:
+            logging.error(f"Could not analyze tweet ID {tweet.id}: {e}")
+            results.append(None)
+    return results
+
+def _score_batch_cached(db: Session, sentiment_pipeline, batch: List[Any], batch_size: int,
+                        cache_stats: Dict[str, int]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Scores a batch, only running texts the sentiment cache hasn't seen through the model.
+    Copies of the same (normalised) text within the batch are scored once.
+    """
+    hashes = [text_hash(tweet.text) for tweet in batch]
+    cache_model = sentiment_cache_key()
+    known = sentiment_cache.get_many(db, cache_model, hashes)
+
+    # One representative tweet per text that still needs the model
+    to_score: Dict[str, Any] = {}
+    for tweet, h in zip(batch, hashes):
+        if h not in known and h not in to_score:
+            to_score[h] = tweet
+
+    if to_score:
+        results = _score_batch(sentiment_pipeline, list(to_score.values()), batch_size)
+        fresh = {h: (r['label'], r['score']) for h, r in zip(to_score, results) if r is not None}
+        sentiment_cache.put_many(db, cache_model, fresh)
+        known.update(fresh)
+
+    cache_stats["tweets"] += len(batch)
+    cache_stats["inferences"] += len(to_score)
+    return [{'label': known[h][0], 'score': known[h][1]} if h in known else None for h in hashes]
+
+def update_sentiment_rollup(db: Session, deltas: Dict[str, List[float]]):
+    """
+    Adds newly scored tweets to the per-project rollup.
+    `deltas` maps project_tag -> [score_sum, score_count]. The caller commits,
+    so the rollup lands in the same transaction as the tweet scores.
+    """
+    if not deltas:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        # One INSERT ... ON CONFLICT DO UPDATE: concurrent analyzers can neither lose each
+        # other's increments nor both try to insert a new project's row
+        stmt = (pg_insert if dialect == "postgresql" else sqlite_insert)(ProjectSentimentRollup)
+        stmt = stmt.on_conflict_do_update(index_elements=[ProjectSentimentRollup.project_tag], set_={
+            "score_sum": ProjectSentimentRollup.score_sum + stmt.excluded.score_sum,
+            "score_count": ProjectSentimentRollup.score_count + stmt.excluded.score_count,
+            "last_updated": func.now(),
+        })
+        # Same row order in every transaction, so concurrent upserts can't deadlock
+        db.execute(stmt, [
+            {"project_tag": project_tag, "score_sum": score_sum, "score_count": int(score_count)}
+            for project_tag, (score_sum, score_count) in sorted(deltas.items())
+        ])
+        return
+
+    # Other databases: update, then insert if the project has no row yet
+    for project_tag, (score_sum, score_count) in deltas.items():
+        # Increment in SQL so concurrent analyzers can't lose each other's updates
+        updated = db.query(ProjectSentimentRollup).filter(
+            ProjectSentimentRollup.project_tag == project_tag
+        ).update({
+            ProjectSentimentRollup.score_sum: ProjectSentimentRollup.score_sum + score_sum,
+            ProjectSentimentRollup.score_count: ProjectSentimentRollup.score_count + int(score_count),
+            ProjectSentimentRollup.last_updated: func.now(),
+        }, synchronize_session=False)
+
+        if not updated:
+            db.add(ProjectSentimentRollup(
+                project_tag=project_tag,
+                score_sum=score_sum,
+                score_count=int(score_count)
+            ))
+
+def _apply_results(batch: List[Any], results: List[Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Turns model results into `tweets` update mappings."""
+    mappings: List[Dict[str, Any]] = []
+    for tweet, result in zip(batch, results):
+        if result is None:
+            mappings.append({"id": tweet.id, "sentiment_label": 'Error', "sentiment_score": None})
+        else:
+            mappings.append({"id": tweet.id, "sentiment_label": result['label'], "sentiment_score": result['score']})
+    return mappings
+
+def _write_scores(db: Session, mappings: List[Dict[str, Any]]) -> Set[int]:
+    """
+    Saves the scores, but only into tweets that are still unscored: another analyzer may
+    have scored some of them since they were read. Each slice is one
+    UPDATE ... WHERE sentiment_label IS NULL ... RETURNING id, so the check and the write
+    are atomic. Returns the ids actually written.
+    """
+    written: Set[int] = set()
+    for i in range(0, len(mappings), SCORE_WRITE_CHUNK):
+        part = mappings[i:i + SCORE_WRITE_CHUNK]
+        labels = {m["id"]: m["sentiment_label"] for m in part}
+        scores = {m["id"]: m["sentiment_score"] for m in part}
+        stmt = update(Tweet).where(Tweet.id.in_(list(labels)), Tweet.sentiment_label == None).values(
+            sentiment_label=case(labels, value=Tweet.id),
+            # Cast so an all-NULL (all errors) CASE isn't typed as text on PostgreSQL
+            sentiment_score=cast(case(scores, value=Tweet.id), Float),
+        ).returning(Tweet.id).execution_options(synchronize_session=False)
+        written.update(db.execute(stmt).scalars())
+    return written
+
+def _score_chunk(db: Session, sentiment_pipeline, chunk: List[Any], batch_size: int, cache_stats: Dict[str, int]):
+    """
+    Scores a chunk of (id, text, project_tag) rows batch by batch, then writes the scores
+    with bulk guarded UPDATEs plus the rollup deltas of the tweets actually written,
+    so a tweet scored concurrently by another analyzer isn't counted twice. The caller commits.
+    """
+    mappings: List[Dict[str, Any]] = []
+    for i in range(0, len(chunk), batch_size):
+        batch = chunk[i:i + batch_size]
+        mappings.extend(_apply_results(batch, _score_batch_cached(db, sentiment_pipeline, batch, batch_size, cache_stats)))
+
+    written = _write_scores(db, mappings)
+    project_tags = {tweet.id: tweet.project_tag for tweet in chunk}
+    rollup_deltas: Dict[str, List[float]] = {}
+    for mapping in mappings:
+        project_tag = project_tags[mapping["id"]]
+        if mapping["id"] in written and mapping["sentiment_score"] is not None and project_tag:
+            delta = rollup_deltas.setdefault(project_tag, [0.0, 0])
+            delta[0] += mapping["sentiment_score"]
+            delta[1] += 1
+    update_sentiment_rollup(db, rollup_deltas)
+
+def _unscored_query(db: Session, project_tag: Optional[str]):
+    """(id, text, project_tag) of the tweets that have no sentiment yet."""
+    query = db.query(Tweet.id, Tweet.text, Tweet.project_tag).filter(Tweet.sentiment_label == None)
+    if project_tag:
+        query = query.filter(Tweet.project_tag == project_tag)
+    return query
+
+def analyze(project_tag: Optional[str] = None, limit: Optional[int] = None, batch_size: Optional[int] = None,
+            commit_every: Optional[int] = None) -> int:
     """
     Finds tweets without sentiment, analyzes them using an AI model,
     and updates the database with the results.
+
+    project_tag: only score this project's tweets (served by ix_project_sentiment).
+    limit: score at most this many tweets, oldest first.
+    batch_size: tweets per forward pass (defaults to SENTIMENT_BATCH_SIZE).
+    commit_every: tweets per commit (defaults to ANALYZER_COMMIT_EVERY).
+
+    Tweets are read in keyset-paginated chunks and each chunk is committed on its own,
+    so memory stays flat and a crash only loses the chunk in progress. Texts already
+    in the sentiment cache are not run through the model again.
+    Returns the number of tweets processed (committed). Raises if the analysis
+    fails; chunks committed before the failure are kept.
     """
+    batch_size = batch_size or SENTIMENT_BATCH_SIZE
+    commit_every = max(batch_size, commit_every or ANALYZER_COMMIT_EVERY)
     db: Session = SessionLocal()
-    
-    logging.info("--- 🧠 Starting Sentiment Analysis ---")
+    scope = f" for {project_tag}" if project_tag else ""
+
+    logging.info(f"--- 🧠 Starting Sentiment Analysis{scope} ---")
 
+    processed = 0
+    cache_stats = {"tweets": 0, "inferences": 0}
+    started = last_report = time.monotonic()
     try:
-        # FIX 1: Explicitly define the 'task' argument to resolve Pylance warning
-        logging.info("Loading sentiment analysis model...")
-        sentiment_pipeline = pipeline(  # type: ignore
-            "sentiment-analysis",  # type: ignore
-            model="cardiffnlp/twitter-roberta-base-sentiment"
+        sentiment_pipeline = get_sentiment_pipeline()
+
+        last_id = 0
+        while limit is None or processed < limit:
+            # Step 1: Fetch the next chunk of unscored tweets after the last one seen
+            chunk_size = commit_every if limit is None else min(commit_every, limit - processed)
+            chunk = _unscored_query(db, project_tag).filter(Tweet.id > last_id).order_by(Tweet.id).limit(chunk_size).all()
+            if not chunk:
+                break
+
+            # Step 2: Analyze it in batches, then save the scores + rollup for this chunk
+            _score_chunk(db, sentiment_pipeline, chunk, batch_size, cache_stats)
+            db.commit()
+            processed += len(chunk)
+            last_id = chunk[-1].id
+
+            now = time.monotonic()
+            if now - last_report >= ANALYZER_PROGRESS_SECONDS:
+                logging.info(f"   ...analyzed {processed} tweets ({processed / (now - started):.1f} tweets/sec)")
+                last_report = now
+
+        if not processed:
+            logging.info(f"✅ No new tweets to analyze{scope}. Database is up to date.")
+            return 0
+
+        hits = cache_stats["tweets"] - cache_stats["inferences"]
+        logging.info(
+            f"♻️ Sentiment cache: {hits}/{cache_stats['tweets']} tweets reused "
+            f"({hits / cache_stats['tweets']:.0%} hit rate), {cache_stats['inferences']} run through the model."
         )
-        logging.info("🤖 Model loaded successfully.")
-
-        # Step 1: Find all tweets that haven't been analyzed yet
-        tweets_to_analyze: List[Tweet] = db.query(Tweet).filter(Tweet.sentiment_label == None).all()
-
-        if not tweets_to_analyze:
-            logging.info("✅ No new tweets to analyze. Database is up to date.")
-            return
-
-        logging.info(f"Found {len(tweets_to_analyze)} tweets to analyze...")
-
-        # Step 2: Analyze each tweet and update the object
-        logging.info("Analyzing tweets...")
-        for i, tweet in enumerate(tweets_to_analyze):
-            try:
-                text_to_analyze = tweet.text
-                result = sentiment_pipeline(text_to_analyze)[0]
-                
-                # Update the tweet object
-                tweet.sentiment_label = result['label']
-                tweet.sentiment_score = result['score']
-
-                if (i + 1) % 10 == 0:
-                    logging.info(f"   ...analyzed {i + 1}/{len(tweets_to_analyze)} tweets")
-
-            except Exception as e:
-                logging.error(f"Could not analyze tweet ID {tweet.id}: {e}")
-                # FIX 2: Assignment is fine here, but we ensure the code structure is clean
-                tweet.sentiment_label = 'Error'  # type: ignore
-        
-        # Step 3: Commit all the changes to the database in one go
-        logging.info("Saving all new sentiment data to the database...")
-        db.commit()
-        logging.info("✅ Analysis complete. Database has been updated.")
+        logging.info(f"✅ Analysis complete. {processed} tweets scored and saved.")
 
     except Exception as e:
+        # Chunks committed before the failure are kept; the next run resumes after them
         logging.error(f"❌ An error occurred during the analysis process: {e}")
         db.rollback()
+        raise
     finally:
         logging.info("Closing database session.")
         db.close()
 
+    return processed
+
+# --- Multi-process workers ---
+
+def _shard_ranges(db: Session, workers: int, project_tag: Optional[str]) -> List[Tuple[int, int]]:
+    """Splits the unscored tweets into up to `workers` contiguous id ranges of about equal size."""
+    ids = _unscored_query(db, project_tag).with_entities(Tweet.id).order_by(Tweet.id)
+    total = ids.count()
+    if not total:
+        return []
+
+    workers = min(workers, total)
+    # First id of each shard, found by offset so shards stay balanced even when ids have gaps
+    starts = [ids.offset(total * i // workers).limit(1).scalar() for i in range(workers)]
+    last_id = ids.order_by(None).order_by(Tweet.id.desc()).limit(1).scalar()
+    ends = [start - 1 for start in starts[1:]] + [last_id]
+    return list(zip(starts, ends))
+
+def _claim_batch(db: Session, first_id: int, last_id: int, project_tag: Optional[str], batch_size: int) -> List[Any]:
+    """Locks and returns the next unscored tweets in the id range."""
+    query = _unscored_query(db, project_tag).filter(Tweet.id.between(first_id, last_id))
+    query = query.order_by(Tweet.id).limit(batch_size)
+    if db.get_bind().dialect.name == "postgresql":
+        # Rows held by another analyzer are skipped instead of waited on
+        query = query.with_for_update(skip_locked=True)
+    return query.all()
+
+def _analyze_shard(first_id: int, last_id: int, project_tag: Optional[str], batch_size: int, torch_threads: int) -> int:
+    """
+    Worker process: loads the model once, then claims, scores and commits batches
+    from its id range until none are left. Returns the number of tweets scored.
+    """
+    import torch
+    # Split the cores between workers instead of every process using all of them
+    torch.set_num_threads(torch_threads)
+
+    name = multiprocessing.current_process().name
+    db: Session = SessionLocal()
+    processed = 0
+    cache_stats = {"tweets": 0, "inferences": 0}
+    started = last_report = time.monotonic()
+    try:
+        sentiment_pipeline = get_sentiment_pipeline()
+        while True:
+            batch = _claim_batch(db, first_id, last_id, project_tag, batch_size)
+            if not batch:
+                break
+            _score_chunk(db, sentiment_pipeline, batch, batch_size, cache_stats)
+            # Committing releases the row locks for this batch
+            db.commit()
+            processed += len(batch)
+
+            now = time.monotonic()
+            if now - last_report >= ANALYZER_PROGRESS_SECONDS:
+                logging.info(f"   ...{name} analyzed {processed} tweets ({processed / (now - started):.1f} tweets/sec, ids {first_id}-{last_id})")
+                last_report = now
+    except Exception as e:
+        logging.error(f"❌ {name} failed on ids {first_id}-{last_id}: {e}")
+        db.rollback()
+    finally:
+        db.close()
+    return processed
+
+def analyze_parallel(workers: int = ANALYZER_WORKERS, project_tag: Optional[str] = None, batch_size: Optional[int] = None) -> int:
+    """
+    Scores the unscored backlog with `workers` processes, one contiguous id range each.
+    Each batch is committed as it finishes, so an interrupted run keeps its progress.
+    Returns the number of tweets processed.
+    """
+    if workers <= 1:
+        return analyze(project_tag=project_tag, batch_size=batch_size)
+
+    batch_size = batch_size or SENTIMENT_BATCH_SIZE
+    db: Session = SessionLocal()
+    try:
+        shards = _shard_ranges(db, workers, project_tag)
+    finally:
+        db.close()
+
+    if not shards:
+        logging.info("✅ No new tweets to analyze. Database is up to date.")
+        return 0
+
+    torch_threads = max(1, (os.cpu_count() or 1) // len(shards))
+    logging.info(f"--- 🧠 Starting Sentiment Analysis with {len(shards)} worker processes ({torch_threads} threads each) ---")
+
+    # spawn, not fork: torch and open DB connections don't survive a fork safely
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as pool:
+        futures = [
+            pool.submit(_analyze_shard, first_id, last_id, project_tag, batch_size, torch_threads)
+            for first_id, last_id in shards
+        ]
+        processed = sum(future.result() for future in futures)
+
+    logging.info(f"✅ Analysis complete. {processed} tweets scored across {len(shards)} workers.")
+    return processed
+
+def analyze_and_update_sentiment(batch_size: Optional[int] = None) -> int:
+    """Scores every unscored tweet across all projects."""
+    return analyze(batch_size=batch_size)
+
 if __name__ == "__main__":
-    analyze_and_update_sentiment()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Score tweets that have no sentiment yet.")
+    parser.add_argument("--project", help="Only analyze this project_tag")
+    parser.add_argument("--limit", type=int, help="Analyze at most this many tweets")
+    parser.add_argument("--workers", type=int, default=ANALYZER_WORKERS,
+                        help="Score the backlog with this many processes (ignores --limit)")
+    args = parser.parse_args()
+    if args.workers > 1:
+        analyze_parallel(workers=args.workers, project_tag=args.project)
+    else:
+        analyze(project_tag=args.project, limit=args.limit)
@@ -0,0 +1,86 @@
+import os
+from typing import List, Optional, Union
+
+from PIL import Image, ImageOps
+
+# Preprocessing between download and OCR. Tesseract is faster and more accurate on
+# small, black-on-white images than on full-resolution colour screenshots.
+PNL_PREPROCESS = os.getenv("PNL_PREPROCESS", "1").lower() not in ("0", "false", "no")
+# Images wider than this are downscaled before OCR. Screenshots carry no meaningful
+# DPI, so the target is a pixel width: ~1000px keeps PNL card text around 30px high.
+PNL_OCR_MAX_WIDTH = int(os.getenv("PNL_OCR_MAX_WIDTH", "1000"))
+# "otsu" picks a threshold per image, a number 0-255 fixes it, "off" keeps grayscale.
+PNL_OCR_THRESHOLD = os.getenv("PNL_OCR_THRESHOLD", "otsu").lower()
+# Crop to the bounding box of the text before OCR.
+PNL_OCR_CROP = os.getenv("PNL_OCR_CROP", "0").lower() in ("1", "true", "yes")
+# Pixels kept around the text when cropping.
+CROP_MARGIN = 10
+
+
+def otsu_threshold(histogram: List[int]) -> int:
+    """Returns the grey level that best separates a 256-bin histogram into two classes."""
+    total = sum(histogram)
+    weighted_total = sum(i * count for i, count in enumerate(histogram))
+    background_count = 0
+    background_sum = 0
+    best_level, best_variance = 0, -1.0
+
+    for level, count in enumerate(histogram):
+        background_count += count
+        if background_count == 0:
+            continue
+        foreground_count = total - background_count
+        if foreground_count == 0:
+            break
+        background_sum += level * count
+        background_mean = background_sum / background_count
+        foreground_mean = (weighted_total - background_sum) / foreground_count
+        variance = background_count * foreground_count * (background_mean - foreground_mean) ** 2
+        if variance > best_variance:
+            best_level, best_variance = level, variance
+    return best_level
+
+def preprocess_image(image: Image.Image, max_width: int = PNL_OCR_MAX_WIDTH,
+                     threshold: Union[str, int, None] = PNL_OCR_THRESHOLD,
+                     crop: bool = PNL_OCR_CROP) -> Image.Image:
+    """
+    Prepares a PNL card screenshot for OCR:
+    grayscale -> downscale to `max_width` -> binarise (dark text on white) -> optional crop to the text.
+    """
+    # 1. Grayscale (also flattens palette / alpha images)
+    gray = image.convert("L")
+
+    # 2. Downscale; never upscale, small images are left alone
+    if max_width and gray.width > max_width:
+        height = max(1, round(gray.height * max_width / gray.width))
+        gray = gray.resize((max_width, height), Image.Resampling.LANCZOS)
+
+    # 3. Threshold (cropping needs the binary image to find the text even when thresholding is off)
+    keep_gray = threshold in (None, "off", "none")
+    binary = None
+    if not keep_gray or crop:
+        level = otsu_threshold(gray.histogram()) if keep_gray or threshold == "otsu" else int(threshold)
+        binary = _binarize(gray, level)
+    result = gray if keep_gray else binary
+
+    # 4. Crop to the text region
+    if crop and binary is not None:
+        bbox = _text_bbox(binary)
+        if bbox:
+            left, top, right, bottom = bbox
+            result = result.crop((max(0, left - CROP_MARGIN), max(0, top - CROP_MARGIN),
+                                  min(result.width, right + CROP_MARGIN), min(result.height, bottom + CROP_MARGIN)))
+    return result
+
+def _binarize(gray: Image.Image, level: int) -> Image.Image:
+    """Thresholds to black and white, flipping light-on-dark cards so the text ends up black."""
+    binary = gray.point(lambda p: 255 if p > level else 0)
+    histogram = binary.histogram()
+    if histogram[0] > histogram[255]:
+        # Mostly black: a dark-theme card, the text is the white part
+        binary = ImageOps.invert(binary)
+    return binary
+
+def _text_bbox(binary: Image.Image) -> Optional[tuple]:
+    """Bounding box of the black (text) pixels."""
+    return ImageOps.invert(binary).getbbox()
@@ -0,0 +1,165 @@
+import os
+import uuid
+import queue
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from services.tracker import run_single_project_tracker
+from services.analyzer import analyze
+
+logger = logging.getLogger("dugtrio.jobs")
+
+# Number of worker threads running update jobs.
+UPDATE_WORKERS = int(os.getenv("UPDATE_WORKERS", "1"))
+# Finished jobs are kept this long so clients can still poll their status.
+JOB_TTL = timedelta(seconds=int(os.getenv("JOB_TTL_SECONDS", "3600")))
+# A project refreshed successfully within this window is not scraped again.
+UPDATE_FRESHNESS = timedelta(seconds=int(os.getenv("UPDATE_FRESHNESS_SECONDS", "60")))
+
+
+class UpdateJobQueue:
+    """
+    Runs on-demand project updates (scrape + sentiment analysis) on background
+    worker threads, so the API can hand back a job id instead of blocking the
+    event loop for the whole pipeline.
+
+    Updates are single-flight per project: a request that arrives while a job for
+    the same project is queued or running gets that job back instead of a new one,
+    and a project refreshed within `freshness` is not refreshed again.
+    """
+
+    def __init__(self, workers: int = UPDATE_WORKERS, freshness: timedelta = UPDATE_FRESHNESS):
+        self._workers = max(1, workers)
+        self._freshness = freshness
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._active: Dict[str, str] = {}      # project key -> queued/running job id
+        self._last_done: Dict[str, str] = {}   # project key -> last successful job id
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        """Starts the worker threads. Safe to call more than once."""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self._workers):
+                thread = threading.Thread(target=self._run, name=f"update-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"🧵 Started {self._workers} update worker(s).")
+
+    def stop(self, timeout: float = 5.0):
+        """Asks the workers to exit once their current job finishes."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join(timeout)
+
+    def submit(self, project_tag: str) -> Dict[str, Any]:
+        """
+        Queues an update for `project_tag` and returns a snapshot of the job.
+        If an update for the project is in flight, or finished within the freshness
+        window, that job is returned instead (with "reused": True).
+        """
+        self.start()
+        now = datetime.utcnow()
+        key = project_tag.lower()
+
+        with self._lock:
+            self._prune(now)
+            existing = self._jobs.get(self._active.get(key, ""))
+            if existing is None:
+                # Only a successful refresh counts as fresh; after a failure the next request retries
+                last_done = self._jobs.get(self._last_done.get(key, ""))
+                if last_done and last_done["status"] == "done" and self._is_fresh(last_done, now):
+                    existing = last_done
+            if existing:
+                logger.info(f"♻️ Reusing update job {existing['id']} for {project_tag} ({existing['status']}).")
+                return dict(existing, reused=True)
+
+            job = self._new_job(project_tag, now)
+            self._jobs[job["id"]] = job
+            self._active[key] = job["id"]
+            # Queue while holding the lock so a concurrent submit can't slip in a duplicate
+            self._queue.put(job["id"])
+            return dict(job, reused=False)
+
+    def _is_fresh(self, job: Dict[str, Any], now: datetime) -> bool:
+        return now - datetime.fromisoformat(job["finished_at"]) <= self._freshness
+
+    @staticmethod
+    def _new_job(project_tag: str, now: datetime) -> Dict[str, Any]:
+        return {
+            "id": uuid.uuid4().hex,
+            "project": project_tag,
+            "status": "queued",    # queued -> running -> done | failed
+            "stage": None,         # scraping | analyzing while running
+            "progress": 0,
+            "error": None,
+            "created_at": now.isoformat(),
+            "started_at": None,
+            "finished_at": None,
+        }
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Returns a snapshot of the job, or None if it is unknown or expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _prune(self, now: datetime):
+        """Drops finished jobs older than JOB_TTL. Caller holds the lock."""
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] and now - datetime.fromisoformat(job["finished_at"]) > JOB_TTL
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        self._last_done = {key: job_id for key, job_id in self._last_done.items() if job_id in self._jobs}
+
+    def _finish(self, job_id: str, **fields):
+        """Records the job outcome and releases the project for new updates."""
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields, finished_at=datetime.utcnow().isoformat())
+            key = job["project"].lower()
+            if self._active.get(key) == job_id:
+                del self._active[key]
+            if job["status"] == "done":
+                self._last_done[key] = job_id
+
+    def _run(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            try:
+                self._run_job(job_id)
+            finally:
+                self._queue.task_done()
+
+    def _run_job(self, job_id: str):
+        project_tag = self._jobs[job_id]["project"]
+        logger.info(f"🔄 Running update job {job_id} for {project_tag}...")
+        self._update(job_id, status="running", stage="scraping", progress=0, started_at=datetime.utcnow().isoformat())
+        try:
+            # 1. Scrape (10 tweets max)
+            stored_tag = run_single_project_tracker(project_tag)
+            self._update(job_id, stage="analyzing", progress=50)
+
+            # 2. Analyze only this project's new tweets (stored under the tracker's casing)
+            analyze(project_tag=stored_tag)
+            self._finish(job_id, status="done", stage=None, progress=100)
+            logger.info(f"✅ Update job {job_id} for {project_tag} finished.")
+        except Exception as e:
+            logger.error(f"Update job {job_id} failed: {e}")
+            self._finish(job_id, status="failed", error=str(e))
@@ -0,0 +1,113 @@
+import os
+import mmap
+import hashlib
+import logging
+import threading
+from typing import Optional
+
+# Downloaded media is kept on disk so reruns and reprocessing don't hit the network again.
+PNL_MEDIA_CACHE = os.getenv("PNL_MEDIA_CACHE", "1").lower() not in ("0", "false", "no")
+PNL_MEDIA_CACHE_DIR = os.getenv("PNL_MEDIA_CACHE_DIR", "media_cache")
+# Size bound; least recently used files are evicted past it.
+PNL_MEDIA_CACHE_MAX_MB = int(os.getenv("PNL_MEDIA_CACHE_MAX_MB", "1024"))
+# Eviction frees down to this share of the bound so it doesn't run on every write.
+EVICT_TO_RATIO = 0.9
+
+
+def media_cache_key(url: str) -> str:
+    """Cache key for a media URL: its sha256."""
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+def read_mapped(path: str) -> mmap.mmap:
+    """Memory-maps a cached file read-only; the caller closes it."""
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class MediaCache:
+    """
+    Content store for downloaded images under `root`, one file per key
+    (root/ab/abcdef...). Recency is the file mtime, bumped on every hit, and
+    the oldest files are evicted once the total passes `max_bytes`.
+    Files are written atomically, so a crash never leaves a partial image behind.
+    """
+
+    def __init__(self, root: str = PNL_MEDIA_CACHE_DIR, max_bytes: int = PNL_MEDIA_CACHE_MAX_MB * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None  # total bytes on disk, computed on first write
+        self._lock = threading.Lock()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached file's path (and marks it recently used), or None on a miss."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, content: bytes) -> Optional[str]:
+        """Stores `content` under `key` and returns its path, or None if it couldn't be written."""
+        path = self.path_for(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not cache media {key[:12]}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._disk_usage()
+            else:
+                self._size += len(content)
+            if self._size > self.max_bytes:
+                self._evict()
+        return path
+
+    def _disk_usage(self) -> int:
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            total += sum(os.path.getsize(os.path.join(dirpath, name)) for name in filenames)
+        return total
+
+    def _evict(self):
+        """Deletes least recently used files until the cache is back under EVICT_TO_RATIO of the bound. Caller holds the lock."""
+        files = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        target = self.max_bytes * EVICT_TO_RATIO
+        size = sum(file_size for _, file_size, _ in files)
+        evicted = 0
+        for _, file_size, path in files:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= file_size
+            evicted += 1
+        self._size = size
+        logging.info(f"🧹 Evicted {evicted} cached images; media cache is now {size / 1024 / 1024:.0f} MB.")
+
+
+# Shared by every PNL run in the process.
+media_cache = MediaCache()
@@ -1,35 +1,87 @@
+import os
+import time
+import hashlib
 import logging
-import re
+import asyncio
+import multiprocessing
+import httpx
 import pytesseract
-import requests
 from PIL import Image
 from io import BytesIO
+from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any, cast
+from typing import List, Optional, Dict, Any, Tuple, Union, cast
 
 from database.connection import SessionLocal
-from database.models import Tweet, PnlCard
+from database.models import Tweet, PnlCard, PnlImageHash, PnlCardMedia
+from services.image_preprocess import PNL_PREPROCESS, preprocess_image
+from services.media_cache import PNL_MEDIA_CACHE, media_cache, media_cache_key, read_mapped
+from services.pnl_parser import parse_pnl_data
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
-def download_image(url: str) -> Optional[Image.Image]:
-    """Downloads an image from a URL and returns a PIL Image object."""
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return Image.open(BytesIO(response.content))
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Error downloading image from {url}: {e}")
-        return None
-    except Exception as e:
-        logging.error(f"Error opening image: {e}")
-        return None
+# --- Download stage ---
+# Max image downloads in flight at once.
+PNL_DOWNLOAD_CONCURRENCY = int(os.getenv("PNL_DOWNLOAD_CONCURRENCY", "8"))
+# Max downloads in flight against any single host (pbs.twimg.com serves nearly all of them).
+PNL_DOWNLOAD_PER_HOST = int(os.getenv("PNL_DOWNLOAD_PER_HOST", "4"))
+# Attempts per image before it is marked download_failed.
+PNL_DOWNLOAD_RETRIES = int(os.getenv("PNL_DOWNLOAD_RETRIES", "3"))
+# Downloaded images waiting for OCR; downloads pause when it is full so memory stays bounded.
+PNL_QUEUE_SIZE = int(os.getenv("PNL_QUEUE_SIZE", "32"))
+# Statuses worth retrying; anything else (404, 403...) fails right away.
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# An image handed to OCR: its bytes, the path of its media cache file, or None if the download failed.
+ImageSource = Union[bytes, str, None]
+# (tweet id, image, media cache key)
+DownloadItem = Tuple[int, ImageSource, Optional[str]]
+
+# --- OCR & writer stages ---
+# Tesseract processes running at once; defaults to one per core.
+PNL_OCR_WORKERS = int(os.getenv("PNL_OCR_WORKERS", str(os.cpu_count() or 1)))
+# Tesseract is killed after this many seconds on one image (0 = no limit).
+PNL_OCR_TIMEOUT_SECONDS = float(os.getenv("PNL_OCR_TIMEOUT_SECONDS", "30"))
+# PnlCards written per commit, so a crash keeps the cards already done.
+PNL_COMMIT_EVERY = int(os.getenv("PNL_COMMIT_EVERY", "50"))
+
+async def fetch_image_bytes(client: httpx.AsyncClient, url: str, host_limit: asyncio.Semaphore,
+                            retries: int = PNL_DOWNLOAD_RETRIES) -> Optional[bytes]:
+    """Downloads one image with the shared client, retrying transient failures with backoff."""
+    for attempt in range(1, retries + 1):
+        try:
+            async with host_limit:
+                response = await client.get(url)
+            response.raise_for_status()
+            return response.content
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code not in RETRYABLE_STATUS_CODES or attempt == retries:
+                logging.error(f"Error downloading image from {url}: {e}")
+                return None
+        except httpx.TransportError as e:
+            if attempt == retries:
+                logging.error(f"Error downloading image from {url}: {e}")
+                return None
+        await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+    return None
 
-def extract_text_from_image(image: Image.Image) -> str:
-    """Extracts text from a PIL Image object using Tesseract OCR."""
+def extract_text_from_image(image: Image.Image, timeout: float = 0) -> str:
+    """
+    Extracts text from a PIL Image object using Tesseract OCR.
+    Raises TimeoutError if Tesseract runs longer than `timeout` seconds (0 = no limit).
+    """
     try:
-        return pytesseract.image_to_string(image)
+        return pytesseract.image_to_string(image, timeout=timeout)
+    except RuntimeError as e:
+        # pytesseract kills the tesseract process and reports it as a RuntimeError
+        if "timeout" in str(e).lower():
+            raise TimeoutError(f"OCR took longer than {timeout}s") from e
+        logging.error(f"Error during OCR extraction: {e}")
+        return ""
     except pytesseract.TesseractNotFoundError:
         logging.error("Tesseract is not installed or not in your PATH.")
         return ""
@@ -37,59 +89,302 @@ def extract_text_from_image(image: Image.Image) -> str:
         logging.error(f"Error during OCR extraction: {e}")
         return ""
 
-def parse_pnl_data(text: str) -> Dict[str, Any]:
-    """Parses extracted text to find PNL-related data."""
-    data: Dict[str, Any] = {
-        "entry_price": None,
-        "exit_price": None,
-        "pnl_percentage": None,
-        "token_symbol": None,
-    }
-    
-    # Normalize text for easier parsing
-    text = text.lower()
-    
-    # --- PNL Percentage Extraction ---
-    pnl_match = re.search(r'(pnl|profit|loss)\s*:?\s*([\+\-]?\s*\d+(\.\d+)?)\s*%', text)
-    if pnl_match:
+def open_image(source: Union[bytes, str]) -> Image.Image:
+    """Decodes image bytes, or a media cache file through a read-only memory map."""
+    if isinstance(source, bytes):
+        return Image.open(BytesIO(source))
+    mapped = read_mapped(source)
+    try:
+        image = Image.open(mapped)
+        image.load()
+        return image
+    finally:
+        mapped.close()
+
+def process_image(tweet_id: int, content: ImageSource, ocr_timeout: float = PNL_OCR_TIMEOUT_SECONDS,
+                  preprocess: bool = PNL_PREPROCESS) -> Dict[str, Any]:
+    """
+    OCRs and parses one downloaded image. Returns the PnlCard fields for the tweet.
+    Runs in the OCR worker processes, so it only takes and returns plain data;
+    cached images are passed as a path and read straight from the file.
+    """
+    if content is None:
+        return {"tweet_id": tweet_id, "analysis_status": 'download_failed'}
+    try:
+        image = open_image(content)
+    except Exception as e:
+        logging.error(f"Error opening image: {e}")
+        return {"tweet_id": tweet_id, "analysis_status": 'download_failed'}
+    if preprocess:
         try:
-            pnl_value = pnl_match.group(2).replace(' ', '').replace('+', '')
-            data['pnl_percentage'] = float(pnl_value)
-        except (ValueError, AttributeError) as e:
-            logging.warning(f"Failed to parse PNL percentage: {e}")
-    
-    if data['pnl_percentage'] is None:
-        pnl_match = re.search(r'([\+\-]\s*\d+(\.\d+)?)\s*%', text)
-        if pnl_match:
+            image = preprocess_image(image)
+        except Exception as e:
+            # The image itself was fine, so don't report it as a failed download
+            logging.error(f"Error preprocessing image for tweet {tweet_id}: {e}")
+            return {"tweet_id": tweet_id, "analysis_status": 'preprocess_failed'}
+
+    started = time.perf_counter()
+    try:
+        extracted_text = extract_text_from_image(image, ocr_timeout)
+    except TimeoutError as e:
+        logging.error(f"OCR timed out for tweet {tweet_id}: {e}")
+        return {"tweet_id": tweet_id, "analysis_status": 'ocr_timeout'}
+    ocr_seconds = time.perf_counter() - started
+    if not extracted_text:
+        return {"tweet_id": tweet_id, "analysis_status": 'ocr_failed'}
+
+    return {
+        "tweet_id": tweet_id,
+        "analysis_status": 'success',
+        "extracted_text": extracted_text,
+        "ocr_seconds": ocr_seconds,
+        **parse_pnl_data(extracted_text),
+    }
+
+def image_fingerprint(content: Union[bytes, str]) -> str:
+    """
+    sha256 of a downloaded image's exact bytes. Only byte-identical copies match:
+    cards rendered from the same template differ by a digit or two, which a
+    perceptual hash can't reliably tell apart.
+    """
+    if isinstance(content, bytes):
+        return hashlib.sha256(content).hexdigest()
+    mapped = read_mapped(content)
+    try:
+        return hashlib.sha256(mapped).hexdigest()
+    finally:
+        mapped.close()
+
+
+class ImageHashIndex:
+    """
+    Known OCR results by image content hash: the pnl_image_hashes table plus
+    results from the current run. Also tracks images being OCR'd right now, so
+    copies that arrive together wait for the first one instead of running OCR too.
+    Used from the event loop only.
+    """
+
+    # PnlCard fields copied onto a repost of a known image
+    CARD_FIELDS = ("analysis_status", "extracted_text", "entry_price", "exit_price", "pnl_percentage", "token_symbol")
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._known: Dict[str, Dict[str, Any]] = {}
+        self.in_flight: Dict[str, "asyncio.Future[None]"] = {}
+        self.reused = 0
+        self.seconds_saved = 0.0
+
+    def lookup(self, image_hash: str) -> Optional[Dict[str, Any]]:
+        if image_hash not in self._known:
+            row = self.db.query(PnlImageHash.ocr_seconds, *(getattr(PnlCard, f) for f in self.CARD_FIELDS)).join(
+                PnlCard, PnlImageHash.pnl_card_id == PnlCard.id
+            ).filter(PnlImageHash.image_hash == image_hash).first()
+            if row is None:
+                return None
+            self._known[image_hash] = dict(row._mapping)
+        return self._known[image_hash]
+
+    def remember(self, image_hash: str, result: Dict[str, Any]):
+        self._known[image_hash] = {"ocr_seconds": result.get("ocr_seconds"), **{f: result.get(f) for f in self.CARD_FIELDS}}
+
+    def reuse(self, tweet_id: int, known: Dict[str, Any]) -> Dict[str, Any]:
+        """Builds the result for a repost from a known image's result."""
+        self.reused += 1
+        self.seconds_saved += known["ocr_seconds"] or 0
+        return {"tweet_id": tweet_id, **{f: known[f] for f in self.CARD_FIELDS}}
+
+
+async def _download_stage(tweets: List[Tuple[int, str]], queue: "asyncio.Queue[Optional[DownloadItem]]"):
+    """
+    Downloads the images with a pooled client and hands them to the OCR stage through `queue`.
+    Images already in the media cache are not downloaded again; new ones are added to it.
+    """
+    host_limits: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(PNL_DOWNLOAD_PER_HOST))
+    limits = httpx.Limits(max_connections=PNL_DOWNLOAD_CONCURRENCY, max_keepalive_connections=PNL_DOWNLOAD_CONCURRENCY)
+    pending = iter(tweets)
+
+    async with httpx.AsyncClient(timeout=10, limits=limits, follow_redirects=True) as client:
+        async def worker():
+            # The iterator is shared, so each tweet is picked up by exactly one worker
+            for tweet_id, url in pending:
+                logging.info(f"Processing tweet {tweet_id} with media URL: {url}")
+                cache_key = media_cache_key(url) if PNL_MEDIA_CACHE else None
+                source: ImageSource = media_cache.get(cache_key) if cache_key else None
+                if source is None:
+                    source = await fetch_image_bytes(client, url, host_limits[httpx.URL(url).host])
+                    if source is not None and cache_key:
+                        # Hand OCR the cached file when the write worked, the bytes otherwise
+                        source = await asyncio.to_thread(media_cache.put, cache_key, source) or source
+                await queue.put((tweet_id, source, cache_key))  # waits while the OCR stage is behind
+
+        await asyncio.gather(*(worker() for _ in range(max(1, PNL_DOWNLOAD_CONCURRENCY))))
+
+class OcrPool:
+    """
+    Spawned process pool for OCR that is replaced when a worker hangs or dies.
+    A running task can't be cancelled in a ProcessPoolExecutor, so a hung tesseract would
+    hold its slot (and block shutdown) forever; killing the pool's processes is the only
+    way to get it back. Tasks that were on the killed pool are run again on the new one.
+    Used from the event loop only.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self.restarts = 0
+        self.executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn, not fork: the event loop and the HTTP client's threads don't survive a fork safely
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    async def run(self, timeout: Optional[float], fn, *args):
+        """Runs fn(*args) in a worker. Raises asyncio.TimeoutError after `timeout` seconds (None = no limit)."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            executor = self.executor
             try:
-                pnl_value = pnl_match.group(1).replace(' ', '').replace('+', '')
-                data['pnl_percentage'] = float(pnl_value)
-            except (ValueError, AttributeError) as e:
-                logging.warning(f"Failed to parse PNL percentage from fallback: {e}")
-    
-    # --- Token Symbol Extraction ---
-    symbol_match = re.search(r'\$([a-z]{3,5})\b', text)
-    if not symbol_match:
-        symbol_match = re.search(r'\b([a-z]{3,5})\b\s*(entry|exit)', text)
-    if symbol_match:
-        data['token_symbol'] = symbol_match.group(1).upper()
-    
-    # --- Entry and Exit Price Extraction ---
-    entry_match = re.search(r'entry\s*(price)?\s*:?\s*\$?(\d+(\.\d+)?)', text)
-    if entry_match:
-        try:
-            data['entry_price'] = float(entry_match.group(2))
-        except (ValueError, AttributeError) as e:
-            logging.warning(f"Failed to parse entry price: {e}")
+                return await asyncio.wait_for(loop.run_in_executor(executor, fn, *args), timeout)
+            except asyncio.TimeoutError:
+                self.restart(executor)
+                raise
+            except BrokenProcessPool:
+                # Killed under us by another task's restart, or a worker crashed
+                self.restart(executor)
+                if attempt:
+                    raise
+
+    def restart(self, executor: ProcessPoolExecutor):
+        """Kills `executor`'s processes and starts a fresh pool, unless it was already replaced."""
+        if executor is not self.executor:
+            return
+        # ProcessPoolExecutor has no public handle on its processes
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        for process in processes:
+            process.kill()
+        # Not cancel_futures: queued tasks fail with BrokenProcessPool and are re-run by run()
+        executor.shutdown(wait=False)
+        self.executor = self._new_executor()
+        self.restarts += 1
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+async def _run_ocr(pool: OcrPool, tweet_id: int, content: ImageSource) -> Dict[str, Any]:
+    try:
+        # Backstop in case tesseract's own timeout doesn't fire (e.g. a hung image decode)
+        backstop = PNL_OCR_TIMEOUT_SECONDS + 10 if PNL_OCR_TIMEOUT_SECONDS else None
+        return await pool.run(backstop, process_image, tweet_id, content)
+    except asyncio.TimeoutError:
+        logging.error(f"OCR worker did not return in time for tweet {tweet_id}; restarted the OCR pool.")
+        return {"tweet_id": tweet_id, "analysis_status": 'ocr_timeout'}
+    except BrokenProcessPool:
+        logging.error(f"OCR worker crashed on tweet {tweet_id}.")
+        return {"tweet_id": tweet_id, "analysis_status": 'ocr_failed'}
+
+async def _ocr_or_reuse(pool: OcrPool, index: ImageHashIndex, tweet_id: int, content: ImageSource) -> Dict[str, Any]:
+    """Reuses the OCR result of a known copy of the image, or runs OCR and records the hash."""
+    if content is None:
+        return {"tweet_id": tweet_id, "analysis_status": 'download_failed'}
 
-    exit_match = re.search(r'exit\s*(price)?\s*:?\s*\$?(\d+(\.\d+)?)', text)
-    if exit_match:
+    try:
+        image_hash = await asyncio.to_thread(image_fingerprint, content)
+    except OSError:
+        return await _run_ocr(pool, tweet_id, content)  # reports the unreadable image
+
+    while image_hash in index.in_flight:
+        await index.in_flight[image_hash]
+    known = index.lookup(image_hash)
+    if known:
+        return index.reuse(tweet_id, known)
+
+    done = asyncio.get_running_loop().create_future()
+    index.in_flight[image_hash] = done
+    try:
+        result = await _run_ocr(pool, tweet_id, content)
+        if result["analysis_status"] == 'success':
+            index.remember(image_hash, result)
+            result["image_hash"] = image_hash
+        return result
+    finally:
+        del index.in_flight[image_hash]
+        done.set_result(None)
+
+async def _ocr_stage(queue: "asyncio.Queue[Optional[DownloadItem]]",
+                     results: "asyncio.Queue[Optional[Dict[str, Any]]]", pool: OcrPool, index: ImageHashIndex):
+    """One OCR slot: sends downloaded images to the process pool and passes the results to the writer."""
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        tweet_id, content, cache_key = item
+        result = await _ocr_or_reuse(pool, index, tweet_id, content)
+        if isinstance(content, str):
+            # The card points at its cached image so it can be reprocessed offline
+            result["media_cache_key"] = cache_key
+        await results.put(result)
+
+async def _writer_stage(db: Session, results: "asyncio.Queue[Optional[Dict[str, Any]]]", counts: Counter):
+    """Saves PnlCards as results arrive, committing every PNL_COMMIT_EVERY cards."""
+    pending = 0
+    while True:
+        result = await results.get()
+        if result is None:
+            break
+        image_hash = result.pop("image_hash", None)
+        ocr_seconds = result.pop("ocr_seconds", None)
+        cache_key = result.pop("media_cache_key", None)
+
+        # Failed downloads / OCR get a PnlCard too (with a failure status) so they aren't retried forever
+        card = PnlCard(**result)
+        db.add(card)
+        if image_hash:
+            db.add(PnlImageHash(image_hash=image_hash, pnl_card=card, ocr_seconds=ocr_seconds))
+        if cache_key:
+            db.add(PnlCardMedia(tweet_id=result["tweet_id"], media_cache_key=cache_key))
+        counts[result["analysis_status"]] += 1
+        pending += 1
+        if pending >= PNL_COMMIT_EVERY:
+            db.commit()
+            pending = 0
+            logging.info(f"   ...saved {sum(counts.values())} PNL cards")
+    db.commit()
+
+async def run_pnl_pipeline(db: Session, tweets: List[Tuple[int, str]], ocr_workers: int = PNL_OCR_WORKERS) -> Counter:
+    """
+    Downloads, OCRs and saves PnlCards for the (tweet id, media url) pairs.
+    Downloads run concurrently and feed a pool of `ocr_workers` OCR processes
+    through a bounded queue; a single writer saves the results to `db`.
+    Byte-identical copies of an already OCR'd image reuse its result.
+    Returns the number of cards per analysis_status.
+    """
+    ocr_workers = max(1, ocr_workers)
+    images: "asyncio.Queue[Optional[DownloadItem]]" = asyncio.Queue(maxsize=PNL_QUEUE_SIZE)
+    results: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+    counts: Counter = Counter()
+    index = ImageHashIndex(db)
+
+    pool = OcrPool(ocr_workers)
+    try:
+        writer = asyncio.create_task(_writer_stage(db, results, counts))
+        ocr = [asyncio.create_task(_ocr_stage(images, results, pool, index)) for _ in range(ocr_workers)]
         try:
-            data['exit_price'] = float(exit_match.group(2))
-        except (ValueError, AttributeError) as e:
-            logging.warning(f"Failed to parse exit price: {e}")
-    
-    return data
+            await _download_stage(tweets, images)
+        finally:
+            for _ in ocr:
+                await images.put(None)
+            await asyncio.gather(*ocr)
+            await results.put(None)
+            await writer
+    finally:
+        pool.shutdown()
+
+    if pool.restarts:
+        logging.warning(f"OCR pool was restarted {pool.restarts} times because of hung workers.")
+
+    if index.reused:
+        logging.info(f"♻️ Reused OCR results for {index.reused} reposted images (~{index.seconds_saved:.1f}s of OCR saved).")
+    return counts
 
 def analyze_pnl_cards():
     """
@@ -101,7 +396,7 @@ def analyze_pnl_cards():
 
     try:
         # Find tweets with a media_url that don't have a corresponding PnlCard entry yet.
-        tweets_to_process: List[Tweet] = db.query(Tweet).filter(
+        tweets_to_process = db.query(Tweet.id, Tweet.media_url).filter(
             Tweet.media_url != None,
             Tweet.pnl_card == None
         ).all()
@@ -112,38 +407,9 @@ def analyze_pnl_cards():
 
         logging.info(f"Found {len(tweets_to_process)} potential PNL cards to analyze...")
 
-        for tweet in tweets_to_process:
-            logging.info(f"Processing tweet {tweet.id} with media URL: {tweet.media_url}")
-
-            # Simplified - media_url is guaranteed to exist from the filter above
-            image = download_image(cast(str, tweet.media_url))
-            if not image:
-                # Create a failed PnlCard entry
-                pnl_card = PnlCard(tweet_id=tweet.id, analysis_status='download_failed')
-                db.add(pnl_card)
-                continue
-
-            extracted_text = extract_text_from_image(image)
-            if not extracted_text:
-                # Create a failed PnlCard entry
-                pnl_card = PnlCard(tweet_id=tweet.id, analysis_status='ocr_failed')
-                db.add(pnl_card)
-                continue
-
-            pnl_data = parse_pnl_data(extracted_text)
-
-            # Create a new PnlCard with the extracted data
-            pnl_card = PnlCard(
-                tweet_id=tweet.id,
-                analysis_status='success',
-                extracted_text=extracted_text,
-                **pnl_data
-            )
-            db.add(pnl_card)
-
-        logging.info("Committing all new PNL card data to the database...")
-        db.commit()
-        logging.info("✅ PNL analysis complete.")
+        # Simplified - media_url is guaranteed to exist from the filter above
+        counts = asyncio.run(run_pnl_pipeline(db, [(t.id, cast(str, t.media_url)) for t in tweets_to_process]))
+        logging.info(f"✅ PNL analysis complete: {dict(counts)}")
 
     except Exception as e:
         logging.error(f"❌ An error occurred during the PNL analysis process: {e}")
@@ -152,5 +418,73 @@ def analyze_pnl_cards():
         logging.info("Closing database session.")
         db.close()
 
+async def _reprocess_cached(db: Session, cached: List[Tuple[Any, str]], ocr_workers: int) -> int:
+    """OCRs and parses the cached images again and updates their cards, committing every PNL_COMMIT_EVERY."""
+    pool = OcrPool(ocr_workers)
+    # At most one image per worker in flight, so the OCR backstop doesn't count time spent queued
+    slots = asyncio.Semaphore(pool.workers)
+
+    async def reprocess(card: Any, path: str) -> Dict[str, Any]:
+        async with slots:
+            result = await _run_ocr(pool, card.tweet_id, path)
+        # Every field is reset so values the new parser no longer finds don't survive
+        mapping: Dict[str, Any] = {field: result.get(field) for field in ImageHashIndex.CARD_FIELDS}
+        mapping["id"] = card.id
+        return mapping
+
+    updated = 0
+    try:
+        for i in range(0, len(cached), PNL_COMMIT_EVERY):
+            mappings = await asyncio.gather(*(reprocess(card, path) for card, path in cached[i:i + PNL_COMMIT_EVERY]))
+            db.execute(update(PnlCard), mappings)
+            db.commit()
+            updated += len(mappings)
+    finally:
+        pool.shutdown()
+    return updated
+
+def reprocess_pnl_cards(ocr_workers: int = PNL_OCR_WORKERS) -> int:
+    """
+    Re-runs OCR and parsing on every PnlCard whose image is in the media cache,
+    e.g. after a parser or preprocessing change. Reads only the cached files, never
+    the network; cards whose file has been evicted are skipped.
+    Returns the number of cards updated.
+    """
+    db: Session = SessionLocal()
+    logging.info("--- 📈 Reprocessing cached PNL cards ---")
+
+    updated = 0
+    try:
+        cards = db.query(PnlCard.id, PnlCard.tweet_id, PnlCardMedia.media_cache_key).join(
+            PnlCardMedia, PnlCardMedia.tweet_id == PnlCard.tweet_id
+        ).order_by(PnlCard.id).all()
+        cached = []
+        for card in cards:
+            path = media_cache.get(card.media_cache_key)
+            if path:
+                cached.append((card, path))
+        if len(cached) < len(cards):
+            logging.warning(f"{len(cards) - len(cached)} cards have no cached image anymore; skipping them.")
+        if not cached:
+            logging.info("✅ No cached PNL cards to reprocess.")
+            return 0
+
+        updated = asyncio.run(_reprocess_cached(db, cached, ocr_workers))
+        logging.info(f"✅ Reprocessed {updated} PNL cards from the media cache.")
+    except Exception as e:
+        logging.error(f"❌ An error occurred while reprocessing PNL cards: {e}")
+        db.rollback()
+    finally:
+        db.close()
+    return updated
+
 if __name__ == "__main__":
-    analyze_pnl_cards()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Extract PNL data from tweet images.")
+    parser.add_argument("--reprocess", action="store_true",
+                        help="Re-OCR and re-parse existing cards from the media cache instead of analyzing new tweets")
+    args = parser.parse_args()
+    if args.reprocess:
+        reprocess_pnl_cards()
+    else:
+        analyze_pnl_cards()
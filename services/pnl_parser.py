@@ -0,0 +1,44 @@
+import re
+import logging
+from typing import Any, Dict, Optional
+
+# --- Patterns (compiled once) ---
+# Each is searched in the lowercased OCR text; the first match wins.
+_PNL_RE = re.compile(r"(pnl|profit|loss)\s*:?\s*([+\-]?\s*\d+(?:\.\d+)?)\s*%")
+_SIGNED_PCT_RE = re.compile(r"([+\-]\s*\d+(?:\.\d+)?)\s*%")
+_CASHTAG_RE = re.compile(r"\$([a-z]{3,5})\b")
+_WORD_BEFORE_KEYWORD_RE = re.compile(r"\b([a-z]{3,5})\b\s*(?:entry|exit)")
+_ENTRY_RE = re.compile(r"entry\s*(?:price)?\s*:?\s*\$?(\d+(?:\.\d+)?)")
+_EXIT_RE = re.compile(r"exit\s*(?:price)?\s*:?\s*\$?(\d+(?:\.\d+)?)")
+
+
+def _to_float(match: Optional["re.Match[str]"], group: int, field: str) -> Optional[float]:
+    if match is None:
+        return None
+    try:
+        return float(match.group(group).replace(' ', '').replace('+', ''))
+    except ValueError as e:
+        logging.warning(f"Failed to parse {field}: {e}")
+        return None
+
+def parse_pnl_data(text: str) -> Dict[str, Any]:
+    """
+    Parses OCR'd PNL card text into entry_price, exit_price, pnl_percentage and token_symbol
+    (None for anything not found). For each field the first match in the text wins:
+    "pnl/profit/loss: x%" before any signed "+x%", and a $cashtag before a short word
+    followed by "entry"/"exit".
+    """
+    text = text.lower()
+
+    pnl_percentage = _to_float(_PNL_RE.search(text), 2, "PNL percentage")
+    if pnl_percentage is None:
+        pnl_percentage = _to_float(_SIGNED_PCT_RE.search(text), 1, "PNL percentage from fallback")
+
+    symbol_match = _CASHTAG_RE.search(text) or _WORD_BEFORE_KEYWORD_RE.search(text)
+
+    return {
+        "entry_price": _to_float(_ENTRY_RE.search(text), 1, "entry price"),
+        "exit_price": _to_float(_EXIT_RE.search(text), 1, "exit price"),
+        "pnl_percentage": pnl_percentage,
+        "token_symbol": symbol_match.group(1).upper() if symbol_match else None,
+    }
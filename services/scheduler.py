@@ -0,0 +1,232 @@
+import os
+import math
+import time
+import heapq
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional
+
+import tweepy
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from database.models import ProjectActivity
+
+logger = logging.getLogger("dugtrio.scheduler")
+
+# Recent search allowance per window. X reports the real numbers in its response
+# headers, so these only matter until the first response comes back.
+X_SEARCH_RATE_LIMIT = int(os.getenv("X_SEARCH_RATE_LIMIT", "60"))
+X_SEARCH_RATE_WINDOW = int(os.getenv("X_SEARCH_RATE_WINDOW", "900"))
+SEARCH_RECENT_ROUTE = "/2/tweets/search/recent"
+# Fallback allowance for any other endpoint.
+X_DEFAULT_RATE_LIMIT = 300
+X_DEFAULT_RATE_WINDOW = 900
+
+
+class RateLimitDeferred(Exception):
+    """Raised when no rate-limit capacity frees up in time. The project is picked up on a later run."""
+
+
+class TokenBucket:
+    """
+    Request allowance for one X endpoint.
+
+    Refills continuously at `capacity / window_seconds` until X tells us better:
+    each response's x-rate-limit-* headers pin the bucket to the server's view
+    (remaining calls, and a full refill at the reset time), so concurrent
+    callers wait for capacity instead of collecting 429s.
+    """
+
+    def __init__(self, capacity: int, window_seconds: int):
+        self.capacity = capacity
+        self.window_seconds = window_seconds
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._reset_at = 0.0  # epoch seconds from x-rate-limit-reset; 0 when unknown
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        if self._reset_at:
+            # The server uses fixed windows: nothing comes back until the reset time
+            if time.time() >= self._reset_at:
+                self._tokens = float(self.capacity)
+                self._reset_at = 0.0
+        else:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.capacity / self.window_seconds)
+        self._updated = now
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Takes one request token, waiting up to `timeout` seconds (forever if None). Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+
+                if self._reset_at:
+                    wait = max(0.0, self._reset_at - time.time()) + 1
+                else:
+                    wait = (1 - self._tokens) * self.window_seconds / self.capacity
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining)
+                self._cond.wait(wait)
+
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """Syncs the bucket with X's x-rate-limit-limit / -remaining / -reset headers."""
+        try:
+            limit = int(headers["x-rate-limit-limit"]) if "x-rate-limit-limit" in headers else None
+            remaining = int(headers["x-rate-limit-remaining"]) if "x-rate-limit-remaining" in headers else None
+            reset_at = float(headers["x-rate-limit-reset"]) if "x-rate-limit-reset" in headers else None
+        except (TypeError, ValueError):
+            return
+
+        with self._cond:
+            if limit:
+                self.capacity = limit
+            if remaining is not None:
+                self._refill()
+                # Other processes share the app's quota, so trust the lower figure
+                self._tokens = min(self._tokens, float(remaining))
+            if reset_at:
+                self._reset_at = reset_at
+            self._cond.notify_all()
+
+
+class RateLimitScheduler:
+    """Process-wide registry of token buckets, one per X endpoint route."""
+
+    def __init__(self):
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket_for(self, route: str) -> TokenBucket:
+        with self._lock:
+            if route not in self._buckets:
+                if route == SEARCH_RECENT_ROUTE:
+                    self._buckets[route] = TokenBucket(X_SEARCH_RATE_LIMIT, X_SEARCH_RATE_WINDOW)
+                else:
+                    self._buckets[route] = TokenBucket(X_DEFAULT_RATE_LIMIT, X_DEFAULT_RATE_WINDOW)
+            return self._buckets[route]
+
+
+scheduler = RateLimitScheduler()
+
+
+class RateLimitedClient(tweepy.Client):
+    """
+    tweepy.Client that takes a token from the endpoint's bucket before every call
+    and feeds the rate-limit headers of every response back into it.
+    `acquire_timeout` bounds how long a call may wait for capacity (None = no bound).
+    """
+
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, *args, acquire_timeout: Optional[float] = None, **kwargs):
+        kwargs["wait_on_rate_limit"] = False  # waiting is the bucket's job
+        super().__init__(*args, **kwargs)
+        self.acquire_timeout = acquire_timeout
+
+    def request(self, method, route, params=None, json=None, user_auth=False):
+        bucket = scheduler.bucket_for(route)
+        for _ in range(self.MAX_ATTEMPTS):
+            if not bucket.acquire(self.acquire_timeout):
+                raise RateLimitDeferred(f"No X API capacity for {route} within {self.acquire_timeout}s")
+            try:
+                response = super().request(method, route, params, json, user_auth)
+            except tweepy.TooManyRequests as e:
+                # Someone else spent our quota; block the bucket until X's reset and retry
+                logger.warning(f"429 from X on {route}; waiting for the rate-limit reset.")
+                bucket.update_from_headers(e.response.headers)
+                continue
+            bucket.update_from_headers(response.headers)
+            return response
+        raise RateLimitDeferred(f"X kept rate limiting {route}")
+
+
+# --- Project priority ---
+
+def prioritize_projects(db: Session, projects: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    Orders projects most-urgent first: staleness (time since the last fetch)
+    weighted by how often users have asked about the project.
+    Projects that were never fetched come first.
+    """
+    keys = [p['name'].lower() for p in projects]
+    activity = {
+        a.project_tag: a for a in
+        db.query(ProjectActivity).filter(ProjectActivity.project_tag.in_(keys)).all()
+    } if keys else {}
+
+    now = datetime.utcnow()
+    heap: List[Any] = []
+    for i, project in enumerate(projects):
+        a = activity.get(project['name'].lower())
+        if a is None or a.last_fetched_at is None:
+            staleness = math.inf
+        else:
+            staleness = (now - a.last_fetched_at.replace(tzinfo=None)).total_seconds()
+        demand = 1 + math.log1p(a.request_count if a else 0)
+        heapq.heappush(heap, (-(staleness * demand), i, project))
+
+    return [heapq.heappop(heap)[2] for _ in range(len(heap))]
+
+def _activity_rows(db: Session, keys: List[str]) -> Dict[str, ProjectActivity]:
+    rows = {a.project_tag: a for a in db.query(ProjectActivity).filter(ProjectActivity.project_tag.in_(keys)).all()}
+    for key in keys:
+        if key not in rows:
+            rows[key] = ProjectActivity(project_tag=key, request_count=0)
+            db.add(rows[key])
+    # Sessions don't autoflush, so flush new rows for later lookups in the same transaction
+    db.flush()
+    return rows
+
+def _upsert_insert(db: Session):
+    """The dialect's insert() with ON CONFLICT support, or None for databases without it."""
+    dialect = db.get_bind().dialect.name
+    return {"postgresql": pg_insert, "sqlite": sqlite_insert}.get(dialect)
+
+def record_project_request(db: Session, project_tag: str):
+    """Counts a user request for the project. The caller commits."""
+    key = project_tag.lower()
+    now = datetime.utcnow()
+    upsert = _upsert_insert(db)
+    if upsert:
+        # One statement, so concurrent requests can't both insert the first row or lose an increment
+        stmt = upsert(ProjectActivity).values(project_tag=key, request_count=1, last_requested_at=now)
+        db.execute(stmt.on_conflict_do_update(index_elements=[ProjectActivity.project_tag], set_={
+            "request_count": ProjectActivity.request_count + stmt.excluded.request_count,
+            "last_requested_at": stmt.excluded.last_requested_at,
+        }))
+        return
+
+    activity = _activity_rows(db, [key])[key]
+    activity.request_count = (activity.request_count or 0) + 1
+    activity.last_requested_at = now
+
+def record_projects_fetched(db: Session, project_tags: List[str]):
+    """Marks the projects as freshly fetched from X. The caller commits."""
+    keys = sorted({tag.lower() for tag in project_tags})
+    if not keys:
+        return
+    now = datetime.utcnow()
+    upsert = _upsert_insert(db)
+    if upsert:
+        stmt = upsert(ProjectActivity).values([
+            {"project_tag": key, "request_count": 0, "last_fetched_at": now} for key in keys
+        ])
+        db.execute(stmt.on_conflict_do_update(index_elements=[ProjectActivity.project_tag], set_={
+            "last_fetched_at": stmt.excluded.last_fetched_at,
+        }))
+        return
+
+    for activity in _activity_rows(db, keys).values():
+        activity.last_fetched_at = now
@@ -0,0 +1,117 @@
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from database.models import SentimentCacheEntry
+
+# Max results held in memory per process (least recently used are evicted first).
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", "50000"))
+# Also keep results in the sentiment_cache table so they survive restarts.
+SENTIMENT_CACHE_PERSIST = os.getenv("SENTIMENT_CACHE_PERSIST", "1").lower() not in ("0", "false", "no")
+
+_URL_RE = re.compile(r"https?://\S+")
+_MENTION_RE = re.compile(r"@\w+")
+_SPACE_RE = re.compile(r"\s+")
+
+# (label, score)
+SentimentResult = Tuple[str, float]
+
+
+def normalize_text(text: str) -> str:
+    """
+    Reduces a tweet to what the sentiment model actually reacts to: links and
+    @mentions become placeholders (as in the model card's preprocessing) and
+    whitespace is collapsed. Case is kept, since RoBERTa is case-sensitive.
+    """
+    text = _URL_RE.sub("http", text)
+    text = _MENTION_RE.sub("@user", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+def text_hash(text: str) -> str:
+    """Cache key for a tweet: sha256 of its normalised text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class SentimentCache:
+    """
+    Thread-safe LRU map of (model name, text hash) -> (label, score).
+    Sits in front of the optional sentiment_cache table: misses are looked up
+    there in bulk, and new results are written back in bulk.
+    """
+
+    def __init__(self, max_size: int = SENTIMENT_CACHE_SIZE, persist: bool = SENTIMENT_CACHE_PERSIST):
+        self.max_size = max_size
+        self.persist = persist
+        self._entries: "OrderedDict[Tuple[str, str], SentimentResult]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_many(self, db: Optional[Session], model_name: str, hashes: Iterable[str]) -> Dict[str, SentimentResult]:
+        """Returns the cached results among `hashes`, checking memory first and then the table."""
+        found: Dict[str, SentimentResult] = {}
+        missing = []
+        with self._lock:
+            for h in set(hashes):
+                result = self._entries.get((model_name, h))
+                if result is None:
+                    missing.append(h)
+                else:
+                    self._entries.move_to_end((model_name, h))
+                    found[h] = result
+
+        if missing and self.persist and db is not None:
+            rows = db.query(SentimentCacheEntry.text_hash, SentimentCacheEntry.label, SentimentCacheEntry.score).filter(
+                SentimentCacheEntry.model_name == model_name,
+                SentimentCacheEntry.text_hash.in_(missing)
+            ).all()
+            stored = {h: (label, score) for h, label, score in rows}
+            self._remember(model_name, stored)
+            found.update(stored)
+        return found
+
+    def put_many(self, db: Optional[Session], model_name: str, results: Dict[str, SentimentResult]):
+        """Caches new results in memory and, when persisting, in the table. The caller commits."""
+        if not results:
+            return
+        self._remember(model_name, results)
+
+        if self.persist and db is not None:
+            rows = [
+                {"text_hash": h, "model_name": model_name, "label": label, "score": score}
+                for h, (label, score) in results.items()
+            ]
+            # Another analyzer may have stored the same text in the meantime; keep its row
+            dialect = db.get_bind().dialect.name
+            if dialect == "postgresql":
+                stmt = pg_insert(SentimentCacheEntry).on_conflict_do_nothing()
+            elif dialect == "sqlite":
+                stmt = sqlite_insert(SentimentCacheEntry).on_conflict_do_nothing()
+            else:
+                stmt = insert(SentimentCacheEntry)
+            db.execute(stmt, rows)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, model_name: str, results: Dict[str, SentimentResult]):
+        with self._lock:
+            for h, result in results.items():
+                self._entries[(model_name, h)] = result
+                self._entries.move_to_end((model_name, h))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+# Shared by every analyzer run in the process.
+sentiment_cache = SentimentCache()
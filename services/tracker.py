@@ -1,73 +1,465 @@
 import os
+import json
+import bisect
+import threading
 import tweepy
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+from sqlalchemy import insert, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
 from database.connection import SessionLocal
-from database.models import Tweet, TrackRequest
+from database.models import Tweet, TrackRequest, TweetWatermark, XApiQuota
+from services.scheduler import RateLimitedClient, RateLimitDeferred, prioritize_projects, record_projects_fetched
 
 # Load environment variables (needed to authenticate X client)
 load_dotenv()
 
-def fetch_and_store(db: Session, client: tweepy.Client, project_tag: str, search_query: str):
-    """Fetches recent tweets and stores new, unique tweets in the database."""
-    print(f"--- Fetching tweets for: {project_tag} ---")
-    
-    start_time = datetime.utcnow() - timedelta(hours=24)
-    start_time_str = start_time.strftime('%Y-%m-%dT%H:%M:%SZ')
+# Rows per INSERT statement; keeps bound parameters under driver limits.
+INSERT_CHUNK_SIZE = 500
+# Max number of project searches in flight at once during a full tracker run.
+TRACKER_CONCURRENCY = int(os.getenv("TRACKER_CONCURRENCY", "4"))
+# X recent search only accepts a since_id from the last 7 days; older marks fall back to start_time.
+WATERMARK_MAX_AGE = timedelta(days=6)
+# Tweet ids are snowflakes: milliseconds since this epoch, shifted left 22 bits.
+X_SNOWFLAKE_EPOCH_MS = 1288834974657
+# How long a search may wait for rate-limit capacity before the project is deferred to the next run.
+TRACKER_RATE_WAIT_SECONDS = float(os.getenv("TRACKER_RATE_WAIT_SECONDS", "60"))
+# On-demand (bot) refreshes should fail fast and fall back to stored data.
+ON_DEMAND_RATE_WAIT_SECONDS = 5.0
 
-    try:
-        # NOTE: X.com Free Tier Limit is 100 tweets/month.
-        # We set max_results=10 to conserve quota.
-        # If you have a Basic/Pro plan, increase this to 50 or 100.
-        response = client.search_recent_tweets(
-            query=search_query,
-            max_results=10, # Minimum allowed by API is 10
-            start_time=start_time_str,
-            tweet_fields=["created_at", "attachments"],
-            expansions=["author_id", "attachments.media_keys"]
+# --- Quota & Pagination ---
+# NOTE: X.com Free Tier Limit is 100 tweets/month, so the defaults pull a single
+# page of 10 tweets per project. If you have a Basic/Pro plan, raise these.
+# Tweets requested per page (X allows 10-100).
+TRACKER_PAGE_SIZE = min(100, max(10, int(os.getenv("TRACKER_PAGE_SIZE", "10"))))
+# Max tweets fetched for one project in one run (pages are followed via next_token until reached).
+TRACKER_PROJECT_BUDGET = int(os.getenv("TRACKER_PROJECT_BUDGET", "10"))
+# Max tweets fetched across all projects in one run.
+TRACKER_RUN_BUDGET = int(os.getenv("TRACKER_RUN_BUDGET", "100"))
+# Tweets your X plan allows per calendar month; the quota ledger stops runs at this cap.
+X_MONTHLY_TWEET_CAP = int(os.getenv("X_MONTHLY_TWEET_CAP", "100"))
+# Smallest max_results X accepts.
+X_MIN_PAGE_SIZE = 10
+# Recorded search responses (JSONL) to replay instead of calling X. Unset = live X API.
+TRACKER_REPLAY_FILE = os.getenv("TRACKER_REPLAY_FILE")
+
+
+class TweetBudget:
+    """Thread-safe tweet allowance shared by the concurrent searches of one run."""
+
+    def __init__(self, total: int):
+        self._remaining = max(0, total)
+        self._consumed = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, wanted: int) -> int:
+        """Takes up to `wanted` tweets from the budget and returns how many were granted."""
+        with self._lock:
+            granted = min(wanted, self._remaining)
+            self._remaining -= granted
+            return granted
+
+    def settle(self, reserved: int, used: int):
+        """Records tweets actually received for a reservation and returns the rest."""
+        with self._lock:
+            self._remaining += reserved - used
+            self._consumed += used
+
+    @property
+    def consumed(self) -> int:
+        return self._consumed
+
+
+# --- Tweet sources ---
+
+class TweetSource(ABC):
+    """
+    Where the tracker gets tweets from. `search_recent_tweets` takes the same
+    arguments as tweepy.Client.search_recent_tweets and returns a tweepy.Response.
+    """
+
+    # Whether fetched tweets are charged to the monthly X quota ledger.
+    counts_against_quota = True
+
+    @abstractmethod
+    def search_recent_tweets(self, query: str, **kwargs) -> tweepy.Response:
+        ...
+
+
+class TweepySource(TweetSource):
+    """
+    The live X API via a tweepy client.
+    With `record_path`, every response is appended to that file in the format ReplaySource reads.
+    """
+
+    def __init__(self, client: tweepy.Client, record_path: Optional[str] = None):
+        self.client = client
+        self.record_path = record_path
+        self._record_lock = threading.Lock()
+
+    def search_recent_tweets(self, query: str, **kwargs) -> tweepy.Response:
+        response = self.client.search_recent_tweets(query=query, **kwargs)
+        if self.record_path:
+            self._record(query, response)
+        return response
+
+    def _record(self, query: str, response: tweepy.Response):
+        includes = getattr(response, "includes", {}) or {}
+        line = json.dumps({
+            "query": query,
+            "data": [tweet.data for tweet in getattr(response, "data", None) or []],
+            "includes": {key: [item.data for item in items] for key, items in includes.items()},
+        })
+        with self._record_lock, open(self.record_path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class ReplaySource(TweetSource):
+    """
+    Serves recorded search responses from a JSONL file, one X API response per line:
+        {"query": "...", "data": [tweet, ...], "includes": {"users": [...], "media": [...]}}
+
+    All recorded tweets for a query are served newest first, `max_results` at a
+    time, with next_token pagination and since_id filtering like the real endpoint.
+    start_time is ignored (recordings are historical). Unknown queries return no tweets.
+    """
+
+    counts_against_quota = False
+
+    def __init__(self, path: str):
+        self.path = path
+        self._tweets: Dict[str, List[Dict[str, Any]]] = {}
+        self._neg_ids: Dict[str, List[int]] = {}   # -tweet id, ascending, for since_id lookups
+        self._users: Dict[str, Dict[str, Any]] = {}
+        self._media: Dict[str, Dict[str, Any]] = {}
+
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                recorded = json.loads(line)
+                self._tweets.setdefault(recorded.get("query", ""), []).extend(recorded.get("data") or [])
+                includes = recorded.get("includes") or {}
+                self._users.update((u["id"], u) for u in includes.get("users", []))
+                self._media.update((m["media_key"], m) for m in includes.get("media", []))
+
+        for query, tweets in self._tweets.items():
+            # Drop re-recorded tweets and order newest first, as X does
+            unique = {tweet["id"]: tweet for tweet in tweets}
+            self._tweets[query] = sorted(unique.values(), key=lambda t: int(t["id"]), reverse=True)
+            self._neg_ids[query] = [-int(t["id"]) for t in self._tweets[query]]
+
+    @property
+    def queries(self) -> List[str]:
+        return list(self._tweets)
+
+    @property
+    def tweet_count(self) -> int:
+        return sum(len(tweets) for tweets in self._tweets.values())
+
+    def search_recent_tweets(self, query: str, max_results: int = 10, since_id: Optional[str] = None,
+                             next_token: Optional[str] = None, **kwargs) -> tweepy.Response:
+        tweets = self._tweets.get(query, [])
+        if next_token:
+            start, end = (int(n) for n in next_token.split(":"))
+        else:
+            start = 0
+            end = bisect.bisect_left(self._neg_ids[query], -int(since_id)) if since_id and tweets else len(tweets)
+
+        page = tweets[start:min(end, start + max_results)]
+        stop = start + len(page)
+        users = {t["author_id"] for t in page if "author_id" in t}
+        media_keys = {key for t in page for key in (t.get("attachments") or {}).get("media_keys", [])}
+
+        return tweepy.Response(
+            data=[tweepy.Tweet(t) for t in page] or None,
+            includes={
+                "users": [tweepy.User(self._users[u]) for u in users if u in self._users],
+                "media": [tweepy.Media(self._media[k]) for k in media_keys if k in self._media],
+            },
+            errors=[],
+            meta={"result_count": len(page), **({"next_token": f"{stop}:{end}"} if stop < end else {})},
         )
 
-        # FIX: Explicitly check for response.data existence before proceeding
-        # This handles the "Cannot access attribute 'data'" error when no results are found.
-        if not getattr(response, "data", None):
-            print(f"No new tweets found for {project_tag}.")
-            return
 
-        tweets: List[Any] = getattr(response, "data", [])
-        
-        # Safely extract user and media mappings from includes, defaulting to empty dicts
-        includes: Dict[str, Any] = getattr(response, "includes", {}) or {}
-        users: Dict[str, Any] = {user["id"]: user for user in includes.get("users", [])}
-        media: Dict[str, Any] = {m["media_key"]: m for m in includes.get("media", [])}
-        new_tweets_count = 0
-
-        for tweet in tweets:
-            exists = db.query(Tweet).filter(Tweet.tweet_id == str(tweet.id)).first()
-            if not exists:
-                media_url = None
-                if tweet.attachments and tweet.attachments.get("media_keys"):
-                    media_key = tweet.attachments["media_keys"][0]
-                    if media.get(media_key, {}).get("type") == "photo":
-                        media_url = media[media_key].get("url")
-
-                new_tweet = Tweet(
-                    tweet_id=str(tweet.id),
-                    text=tweet.text,
-                    author_username=users.get(tweet.author_id, {}).get("username", "Unknown"),
-                    created_at=tweet.created_at,
-                    project_tag=project_tag,
-                    media_url=media_url
-                )
-                db.add(new_tweet)
-                new_tweets_count += 1
-        
-        print(f"Found and added {new_tweets_count} new tweets.")
+def build_tweet_source(acquire_timeout: Optional[float]) -> TweetSource:
+    """
+    Replays TRACKER_REPLAY_FILE when it is set; otherwise connects to X with BEARER_TOKEN.
+    Raises ValueError when neither is configured.
+    """
+    if TRACKER_REPLAY_FILE:
+        print(f"📼 Replaying recorded tweets from {TRACKER_REPLAY_FILE} (X API not used).")
+        return ReplaySource(TRACKER_REPLAY_FILE)
 
-    except Exception as e:
-        print(f"An error occurred while fetching tweets for {project_tag}: {e}")
+    bearer_token = os.getenv("BEARER_TOKEN")
+    if not bearer_token:
+        raise ValueError("BEARER_TOKEN not found in .env file.")
+    return TweepySource(RateLimitedClient(bearer_token=bearer_token, acquire_timeout=acquire_timeout))
+
+
+def _current_month() -> str:
+    return datetime.utcnow().strftime('%Y-%m')
+
+def get_monthly_quota_remaining(db: Session) -> int:
+    """Returns how many tweets can still be fetched this month according to the quota ledger."""
+    consumed = db.query(XApiQuota.tweets_consumed).filter(XApiQuota.month == _current_month()).scalar() or 0
+    return max(0, X_MONTHLY_TWEET_CAP - consumed)
+
+def record_quota_usage(db: Session, tweets: int):
+    """Adds consumed tweets to this month's ledger entry. The caller commits."""
+    if tweets <= 0:
+        return
+    month = _current_month()
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        # One upsert, so concurrent runs can't both insert the month's first row
+        stmt = (pg_insert if dialect == "postgresql" else sqlite_insert)(XApiQuota).values(month=month, tweets_consumed=tweets)
+        db.execute(stmt.on_conflict_do_update(index_elements=[XApiQuota.month], set_={
+            "tweets_consumed": XApiQuota.tweets_consumed + stmt.excluded.tweets_consumed,
+            "updated_at": func.now(),
+        }))
+        return
+
+    updated = db.query(XApiQuota).filter(XApiQuota.month == month).update({
+        XApiQuota.tweets_consumed: XApiQuota.tweets_consumed + tweets,
+        XApiQuota.updated_at: func.now(),
+    }, synchronize_session=False)
+    if not updated:
+        db.add(XApiQuota(month=month, tweets_consumed=tweets))
+
+def _tweet_row(tweet: Any, users: Dict[str, Any], media: Dict[str, Any], project_tag: str) -> Dict[str, Any]:
+    """Builds a `tweets` row from an X API tweet and its expanded users/media."""
+    media_url = None
+    if tweet.attachments and tweet.attachments.get("media_keys"):
+        media_key = tweet.attachments["media_keys"][0]
+        if media.get(media_key, {}).get("type") == "photo":
+            media_url = media[media_key].get("url")
+
+    return {
+        "tweet_id": str(tweet.id),
+        "text": tweet.text,
+        "author_username": users.get(tweet.author_id, {}).get("username", "Unknown"),
+        "created_at": tweet.created_at,
+        "project_tag": project_tag,
+        "media_url": media_url,
+    }
+
+def insert_tweets(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """
+    Bulk-inserts tweet rows, skipping any tweet_id that is already stored.
+    When the same tweet appears more than once, the first row wins, so pass rows
+    in project priority order. Returns the number of rows actually inserted. The caller commits.
+
+    PostgreSQL uses INSERT ... ON CONFLICT (tweet_id) DO NOTHING; other databases
+    (SQLite) filter out known ids with one IN-list query per chunk instead.
+    """
+    # Drop duplicates within the batch itself (the same tweet can match several searches)
+    unique: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        unique.setdefault(row["tweet_id"], row)
+    unique_rows = list(unique.values())
+    use_on_conflict = db.get_bind().dialect.name == "postgresql"
+
+    inserted = 0
+    for i in range(0, len(unique_rows), INSERT_CHUNK_SIZE):
+        chunk = unique_rows[i:i + INSERT_CHUNK_SIZE]
+
+        if use_on_conflict:
+            stmt = pg_insert(Tweet).values(chunk).on_conflict_do_nothing(
+                index_elements=["tweet_id"]
+            ).returning(Tweet.id)
+            inserted += len(db.execute(stmt).all())
+            continue
+
+        known_ids = {
+            tweet_id for (tweet_id,) in
+            db.query(Tweet.tweet_id).filter(Tweet.tweet_id.in_([row["tweet_id"] for row in chunk]))
+        }
+        new_rows = [row for row in chunk if row["tweet_id"] not in known_ids]
+        if new_rows:
+            db.execute(insert(Tweet), new_rows)
+            inserted += len(new_rows)
+
+    return inserted
+
+def tweet_id_created_at(tweet_id: str) -> datetime:
+    """When a tweet was created (naive UTC), read from its snowflake id."""
+    return datetime.utcfromtimestamp(((int(tweet_id) >> 22) + X_SNOWFLAKE_EPOCH_MS) / 1000)
+
+def get_watermarks(db: Session, project_tags: List[str]) -> Dict[str, str]:
+    """Returns project_tag -> since_id for projects whose high-water mark is still usable."""
+    if not project_tags:
+        return {}
+    cutoff = datetime.utcnow() - WATERMARK_MAX_AGE
+    marks = db.query(TweetWatermark).filter(TweetWatermark.project_tag.in_(project_tags)).all()
+    # X checks the age of the since_id tweet itself, so that's what decides, not when the mark was saved
+    return {m.project_tag: m.since_id for m in marks if tweet_id_created_at(m.since_id) >= cutoff}
+
+def advance_watermarks(db: Session, rows: List[Dict[str, Any]]):
+    """
+    Moves each project's high-water mark up to the newest tweet id fetched, even when its
+    search stopped at the budget: like a single page of the newest tweets, the tracker
+    samples the most recent ones, and the older tweets it didn't reach are skipped.
+    The caller commits.
+    """
+    newest: Dict[str, int] = {}
+    for row in rows:
+        tweet_id = int(row["tweet_id"])
+        if tweet_id > newest.get(row["project_tag"], 0):
+            newest[row["project_tag"]] = tweet_id
+    if not newest:
+        return
+
+    existing = {
+        m.project_tag: m for m in
+        db.query(TweetWatermark).filter(TweetWatermark.project_tag.in_(list(newest))).all()
+    }
+    for project_tag, tweet_id in newest.items():
+        mark = existing.get(project_tag)
+        if mark is None:
+            db.add(TweetWatermark(project_tag=project_tag, since_id=str(tweet_id)))
+        elif tweet_id > int(mark.since_id):
+            mark.since_id = str(tweet_id)
+
+def fetch_tweets(source: TweetSource, project_tag: str, search_query: str, since_id: Optional[str] = None,
+                 budget: Optional[TweetBudget] = None, project_budget: int = TRACKER_PROJECT_BUDGET) -> List[Dict[str, Any]]:
+    """
+    Fetches recent tweets for a project and returns them as `tweets` rows. Does not touch the database.
+    With a `since_id` high-water mark only tweets newer than it are requested;
+    otherwise the search covers the last 24 hours.
+
+    Pages are followed via next_token until the project's `project_budget` or the
+    shared run `budget` is used up, or X has nothing more.
+    Raises if the first page can't be fetched (RateLimitDeferred when the rate limiter
+    defers it); a failure on a later page keeps the tweets fetched so far.
+    """
+    print(f"--- Fetching tweets for: {project_tag} ---")
+
+    window: Dict[str, str] = {}
+    if since_id:
+        window["since_id"] = since_id
+    else:
+        start_time = datetime.utcnow() - timedelta(hours=24)
+        window["start_time"] = start_time.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    rows: List[Dict[str, Any]] = []
+    next_token: Optional[str] = None
+    while True:
+        wanted = min(TRACKER_PAGE_SIZE, project_budget - len(rows))
+        granted = budget.reserve(wanted) if budget else wanted
+        if granted < X_MIN_PAGE_SIZE:
+            # X won't serve a page smaller than 10, so a smaller allowance ends the project
+            if budget:
+                budget.settle(granted, 0)
+            break
+
+        received = 0
+        try:
+            pagination = {"next_token": next_token} if next_token else {}
+            response = source.search_recent_tweets(
+                query=search_query,
+                max_results=granted, # Minimum allowed by API is 10
+                tweet_fields=["created_at", "attachments"],
+                expansions=["author_id", "attachments.media_keys"],
+                **window,
+                **pagination
+            )
+
+            # FIX: Explicitly check for response.data existence before proceeding
+            # This handles the "Cannot access attribute 'data'" error when no results are found.
+            tweets: List[Any] = getattr(response, "data", None) or []
+            received = len(tweets)
+
+            # Safely extract user and media mappings from includes, defaulting to empty dicts
+            includes: Dict[str, Any] = getattr(response, "includes", {}) or {}
+            users: Dict[str, Any] = {user["id"]: user for user in includes.get("users", [])}
+            media: Dict[str, Any] = {m["media_key"]: m for m in includes.get("media", [])}
+
+            rows.extend(_tweet_row(tweet, users, media, project_tag) for tweet in tweets)
+            next_token = (getattr(response, "meta", None) or {}).get("next_token")
+
+        except RateLimitDeferred as e:
+            print(f"⏳ Rate limit reached while fetching {project_tag}: {e}")
+            if not rows:
+                raise
+            next_token = None
+        except Exception as e:
+            print(f"An error occurred while fetching tweets for {project_tag}: {e}")
+            # With nothing fetched the search failed outright (e.g. a rejected token); let the caller know
+            if not rows:
+                raise
+            next_token = None
+        finally:
+            if budget:
+                budget.settle(granted, received)
+
+        if not next_token:
+            break
+
+    if not rows:
+        print(f"No new tweets found for {project_tag}.")
+    elif next_token:
+        print(f"{project_tag}: stopped at the tweet budget; older tweets in the window are skipped.")
+    return rows
+
+def fetch_and_store(db: Session, source: TweetSource, project_tag: str, search_query: str) -> int:
+    """
+    Fetches tweets newer than the project's watermark and stores them, within this
+    month's remaining X quota. Returns the number added.
+    """
+    budget = TweetBudget(get_monthly_quota_remaining(db)) if source.counts_against_quota else None
+    since_id = get_watermarks(db, [project_tag]).get(project_tag)
+    rows = fetch_tweets(source, project_tag, search_query, since_id, budget)
+    new_tweets_count = insert_tweets(db, rows)
+    advance_watermarks(db, rows)
+    if budget:
+        record_quota_usage(db, budget.consumed)
+    record_projects_fetched(db, [project_tag])
+    quota_note = f" ({budget.consumed} tweets of quota used)" if budget else ""
+    print(f"Found and added {new_tweets_count} new tweets{quota_note}.")
+    return new_tweets_count
+
+def fetch_all_projects(source: TweetSource, projects: List[Dict[str, str]], since_ids: Optional[Dict[str, str]] = None,
+                       budget: Optional[TweetBudget] = None, concurrency: int = TRACKER_CONCURRENCY,
+                       project_budget: int = TRACKER_PROJECT_BUDGET) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Runs the per-project searches in parallel on a thread pool (at most `concurrency`
+    requests in flight). Projects are started in list order, so pass them most-urgent first.
+    `since_ids` maps project name -> high-water mark (see get_watermarks);
+    `budget` caps the tweets fetched across all projects, `project_budget` each project.
+
+    Returns all fetched rows (for a single bulk insert) and the names of the projects
+    that were searched; projects deferred by the rate limiter or whose search failed are left out. Both follow
+    the order of `projects`, not completion order, so a tweet matched by several
+    projects is always tagged with the same (most urgent) one.
+    """
+    if not projects:
+        return [], []
+
+    since_ids = since_ids or {}
+    fetched: Dict[str, List[Dict[str, Any]]] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(projects))), thread_name_prefix="tracker") as pool:
+        futures = {
+            pool.submit(fetch_tweets, source, p['name'], p['query'], since_ids.get(p['name']), budget, project_budget): p['name']
+            for p in projects
+        }
+        for future in as_completed(futures):
+            try:
+                fetched[futures[future]] = future.result()
+            except RateLimitDeferred:
+                print(f"⏭️ Deferred {futures[future]} to the next run.")
+            except Exception as e:
+                print(f"⏭️ Skipped {futures[future]} this run: {e}")
+
+    searched = [p['name'] for p in projects if p['name'] in fetched]
+    rows = [row for name in searched for row in fetched[name]]
+    return rows, searched
 
 def get_projects_to_track(db: Session) -> List[Dict[str, str]]:
     """
@@ -90,23 +482,20 @@ def get_projects_to_track(db: Session) -> List[Dict[str, str]]:
     print(f"Found {len(projects)} projects to track.")
     return projects
 
-def run_single_project_tracker(target_project: str):
+def run_single_project_tracker(target_project: str) -> str:
     """
     Runs the tracker for a single specific project.
     Useful for on-demand updates from the bot.
+    Returns the project_tag the tweets were stored under. Raises if the update
+    failed (no credentials, search rejected or deferred by the rate limiter, database error).
     """
     print(f"🚀 Starting on-demand tracker for: {target_project}")
     
     try:
-        bearer_token = os.getenv("BEARER_TOKEN")
-        if not bearer_token:
-            print("❌ BEARER_TOKEN missing.")
-            return
-        
-        client = tweepy.Client(bearer_token=bearer_token)
+        source = build_tweet_source(ON_DEMAND_RATE_WAIT_SECONDS)
     except Exception as e:
         print(f"❌ Auth Error: {e}")
-        return
+        raise
 
     db = SessionLocal()
     try:
@@ -125,13 +514,15 @@ def run_single_project_tracker(target_project: str):
             }
 
         # 3. Fetch
-        fetch_and_store(db, client, project_data['name'], project_data['query'])
+        fetch_and_store(db, source, project_data['name'], project_data['query'])
         db.commit()
         print(f"✅ On-demand update complete for {target_project}")
+        return project_data['name']
 
     except Exception as e:
         print(f"❌ Error: {e}")
         db.rollback()
+        raise
     finally:
         db.close()
 
@@ -139,12 +530,10 @@ def main():
     """Main function to orchestrate the data fetching process."""
 
     try:
-        bearer_token = os.getenv("BEARER_TOKEN")
-        if not bearer_token:
-            raise ValueError("BEARER_TOKEN not found in .env file.")
-        
-        client = tweepy.Client(bearer_token=bearer_token)
-        print("✅ Successfully authenticated with X.com API.")
+        # Parallel searches share one client, paced by the per-endpoint token buckets
+        source = build_tweet_source(TRACKER_RATE_WAIT_SECONDS)
+        if source.counts_against_quota:
+            print("✅ Successfully authenticated with X.com API.")
     except Exception as e:
         print(f"❌ Error authenticating with X.com API: {e}")
         return
@@ -152,13 +541,30 @@ def main():
     db = SessionLocal()
 
     try:
-        projects_to_track = get_projects_to_track(db)
+        # Most stale / most requested projects first, so they get rate-limit capacity first
+        projects_to_track = prioritize_projects(db, get_projects_to_track(db))
 
-        for project in projects_to_track:
-            fetch_and_store(db, client, project['name'], project['query'])
-        
-        print("\nCommitting all new tweets to the database...")
+        print(f"Searching {len(projects_to_track)} projects with up to {TRACKER_CONCURRENCY} in parallel...")
+        if source.counts_against_quota:
+            quota_remaining = get_monthly_quota_remaining(db)
+            budget = TweetBudget(min(TRACKER_RUN_BUDGET, quota_remaining))
+            print(f"Monthly X quota remaining: {quota_remaining} tweets (run budget {TRACKER_RUN_BUDGET}).")
+        else:
+            budget = TweetBudget(TRACKER_RUN_BUDGET)
+            print(f"Run budget: {TRACKER_RUN_BUDGET} tweets.")
+
+        since_ids = get_watermarks(db, [p['name'] for p in projects_to_track])
+        rows, searched = fetch_all_projects(source, projects_to_track, since_ids, budget)
+
+        print(f"\nCommitting {len(rows)} fetched tweets to the database...")
+        new_tweets_count = insert_tweets(db, rows)
+        advance_watermarks(db, rows)
+        if source.counts_against_quota:
+            record_quota_usage(db, budget.consumed)
+        record_projects_fetched(db, searched)
         db.commit()
+        quota_note = f" ({budget.consumed} tweets of quota used)" if source.counts_against_quota else ""
+        print(f"Added {new_tweets_count} new tweets{quota_note}.")
         print("✅ Successfully saved new data.")
     
     except Exception as e: